@@ -44,12 +44,8 @@ from mpl_toolkits import axes_grid1
 ## Import analytic expressions for the focused fields from a point dipole.
 from ..optics import anal_foc_diff_fields as afi
 
-## Import physical constants from yaml file.
-phys_const_file_name = '/physical_constants.yaml'
-opened_constant_file = open(
-    parameter_files_path+phys_const_file_name,
-    'r')
-constants = yaml.load(opened_constant_file)
+## Import physical constants, already loaded from yaml by 'coupled_dipoles'
+constants = fit.constants
 e = constants['physical_constants']['e']
 c = constants['physical_constants']['c']  # charge of electron in statcoloumbs
 hbar = constants['physical_constants']['hbar']
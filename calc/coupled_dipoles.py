@@ -4,6 +4,9 @@ Module for general electrodynamics of electric dipoles, their interactions, and
 
 from misloc_mispol_package import project_path
 from misloc_mispol_package.optics import anal_foc_diff_fields as aff
+from misloc_mispol_package.optics import fibonacci as fib
+
+import functools
 
 import numpy as np
 import scipy.special as spl
@@ -14,18 +17,35 @@ parameter_files_path = (
     project_path + '/param'
 )
 
+## Parsed once on import, the other modules in the package reuse 'constants'
+## instead of reading the file again.
 phys_const_file_name = '/physical_constants.yaml'
-opened_constant_file = open(
-    parameter_files_path+phys_const_file_name,
-    'r')
-constants = yaml.load(opened_constant_file,
-                      Loader=yaml.SafeLoader) # (Zu Edit: Loader=yaml.SafeLoader)
+with open(parameter_files_path+phys_const_file_name, 'r') as opened_constant_file:
+    constants = yaml.safe_load(opened_constant_file)
 e = constants['physical_constants']['e']
 c = constants['physical_constants']['c']  # charge of electron in statcoloumbs
 hbar = constants['physical_constants']['hbar']
 nm = constants['physical_constants']['nm']
 n_a = constants['physical_constants']['nA']
 
+## Diagonal components (xx, yy, zz) kept by each particle polarizability
+## 'isolate_mode'. Long axis is x for spheres and prolate spheroids, and
+## short axis is z for oblate spheroids.
+isolate_mode_masks = {
+    None: np.array([True, True, True]),
+    'long': np.array([True, False, False]),
+    'short': np.array([False, True, True]),
+    'trans': np.array([False, True, True]),
+    }
+oblate_isolate_mode_masks = {
+    None: np.array([True, True, True]),
+    'long': np.array([True, True, False]),
+    'short': np.array([False, False, True]),
+    'trans': np.array([False, False, True]),
+    }
+for mask in (*isolate_mode_masks.values(), *oblate_isolate_mode_masks.values()):
+    mask.flags.writeable = False
+
 
 ## Adopted from old oscillator code
 def fluorophore_mass(ext_coef, gamma, n_b):
@@ -41,47 +61,77 @@ def sparse_polarizability_tensor(mass, w_res, w, gamma_nr, a, eps_inf, eps_b):
         from Drude model > Clausius-mosati.
         Assumes physical constants definded; e, c
     '''
-    gamma_r = gamma_nr + (2*e**2./(3*mass*c**3.))*w**2.
-    alpha_0_xx_osc = (e**2. / mass)/(w_res**2. - w**2. - 1j*gamma_r*w)
-    alpha_0_xx_static = (a**3. * (eps_inf - 1*eps_b)/(eps_inf + 2*eps_b))
+    gamma_r = gamma_nr + (2*e**2/(3*mass*c**3))*w**2
+    alpha_0_xx_osc = (e**2 / mass)/(w_res**2 - w**2 - 1j*gamma_r*w)
+    alpha_0_xx_static = (a**3 * (eps_inf - 1*eps_b)/(eps_inf + 2*eps_b))
     alpha_0_xx = alpha_0_xx_osc + alpha_0_xx_static
 
-    if type(alpha_0_xx) is np.ndarray and alpha_0_xx.size > 1:
-        alpha_0_xx = alpha_0_xx[..., None, None]
+    alpha_0_xx = np.asarray(alpha_0_xx)
 
-    alpha_0_ij = alpha_0_xx * np.array([
-        [1, 0, 0],
-        [0, 0, 0],
-        [0, 0, 0]
-        ])
+    ## Only the xx component is nonzero, so write it straight into the
+    ## tensor instead of scaling a mask that is mostly zeros. Frequency
+    ## dimensions of any rank lead the (3, 3) tensor dimensions.
+    alpha_0_ij = np.zeros(alpha_0_xx.shape + (3, 3), dtype=alpha_0_xx.dtype)
+    alpha_0_ij[..., 0, 0] = alpha_0_xx
 
     return alpha_0_ij
 
+@functools.lru_cache(maxsize=128)
+def ellipsoid_depolarization_factors(a_x, a_y, a_z):
+    ''' Static geometric factors 'L_i' of an ellipsoid with semi-axes
+        'a_x', 'a_y', 'a_z', from the closed form in terms of incomplete
+        elliptic integrals of the first and second kind (Osborn, Phys.
+        Rev. 67, 351). Spheroids and spheres are handled by their limits.
+
+        Returns tuple (L_x, L_y, L_z) ordered like the given radii. Results
+        are cached, since the shape is fixed across a spectrum.
+        '''
+    radii = np.array([a_x, a_y, a_z], dtype=float)
+    ## Formulas assume a >= b >= c
+    order = np.argsort(radii)[::-1]
+    a, b, c = radii[order]
+
+    prolate_limit = np.isclose(b, c)
+    oblate_limit = np.isclose(a, b)
+
+    if prolate_limit and oblate_limit:
+        L_1 = L_2 = L_3 = 1/3
+    else:
+        phi = np.arcsin(np.sqrt(1 - c**2/a**2))
+        m = (a**2 - b**2)/(a**2 - c**2) ## scipy takes m = k^2
+        F = spl.ellipkinc(phi, m)
+        E = spl.ellipeinc(phi, m)
+        prefactor = a*b*c/np.sqrt(a**2 - c**2)
+
+        if prolate_limit:
+            L_1 = prefactor/(a**2 - b**2) * (F - E)
+            L_2 = L_3 = (1 - L_1)/2
+        elif oblate_limit:
+            L_3 = prefactor/(b**2 - c**2) * (
+                b*np.sqrt(a**2 - c**2)/(a*c) - E)
+            L_1 = L_2 = (1 - L_3)/2
+        else:
+            L_1 = prefactor/(a**2 - b**2) * (F - E)
+            L_3 = prefactor/(b**2 - c**2) * (
+                b*np.sqrt(a**2 - c**2)/(a*c) - E)
+            L_2 = 1 - L_1 - L_3
+
+    ## Map back to the order of the given radii
+    L = np.empty(3)
+    L[order] = [L_1, L_2, L_3]
+
+    return tuple(L)
+
 def sparse_ellipsoid_polarizability(eps, eps_b, a_x, a_y, a_z):
-    ''' '''
-    def L_i(a, b, c):
-        ''' assumes 'a' is ith radius for 'L_i'
-        Don't think this will trivially converge'''
-        q = np.linspace(0,10000,100000)*nm**2.
-        ## these parameters led to ...
-        ##... L_1 + L_2 + L_3 = ~.98 for my 44 x 20 x 20 nm rod
-        ## not sure if they will
-        fq = ( (a**2. + q) * (b**2. + q) * (c**2. + q) )**0.5
-        integrand = 1/( (a**2. + q) * fq )
-        integral = np.trapz(integrand, q)
-        L_val = (a*b*c/2) * integral
-
-        return L_val
-
-    def alpha_ii(a, b, c):
-        alpha = a*b*c * (eps - eps_b)/(
-            3*eps_b + 3*L_i(a,b,c)*(eps-eps_b)
-            )
-        return alpha
+    ''' Quasistatic polarizability of an ellipsoid with semi-axes 'a_x',
+        'a_y', 'a_z' along the cartesian axes.
+        '''
+    L_x, L_y, L_z = ellipsoid_depolarization_factors(a_x, a_y, a_z)
 
-    alpha_1 = alpha_ii(a_x,a_y,a_z)
-    alpha_2 = alpha_ii(a_y,a_z,a_x)
-    alpha_3 = alpha_ii(a_z,a_x,a_y)
+    volume_factor = a_x*a_y*a_z * (eps - eps_b)
+    alpha_1 = volume_factor/(3*eps_b + 3*L_x*(eps-eps_b))
+    alpha_2 = volume_factor/(3*eps_b + 3*L_y*(eps-eps_b))
+    alpha_3 = volume_factor/(3*eps_b + 3*L_z*(eps-eps_b))
 
     alpha_ij = np.array([[alpha_1,      0.,      0.],
                          [     0., alpha_2,      0.],
@@ -90,15 +140,15 @@ def sparse_ellipsoid_polarizability(eps, eps_b, a_x, a_y, a_z):
 
 def drude_model(w, eps_inf, w_p, gamma):
     ''' '''
-    eps = eps_inf - w_p**2./(w**2. + 1j*w*gamma)
+    eps = eps_inf - w_p**2/(w**2 + 1j*w*gamma)
     return eps
 
 def drude_lorentz_model(w, eps_inf, w_p, gamma, f_1, w_1):
     ''' '''
-    eps = eps_inf - w_p**2. * (
-        (1-f_1)/(w**2. + 1j*w*gamma)
+    eps = eps_inf - w_p**2 * (
+        (1-f_1)/(w**2 + 1j*w*gamma)
         +
-        f_1/(w**2. + 1j*w*gamma - w_1**2.)
+        f_1/(w**2 + 1j*w*gamma - w_1**2)
         )
     return eps
 
@@ -114,7 +164,7 @@ def sigma_scat_spheroid(w, eps_inf, w_p, gamma,
     alpha = sparse_ellipsoid_polarizability_drude(
         w, eps_inf, w_p, gamma, eps_b, a_x, a_y, a_z)
 
-    sigma = (8*np.pi/3)*(w/c)**4.*(np.abs(alpha[0,0])**2.
+    sigma = (8*np.pi/3)*(w/c)**4*(np.abs(alpha[0,0])**2
         # + np.abs(alpha[1,1])**2.
         )
     return sigma
@@ -124,13 +174,44 @@ def sigma_scat_spheroid(w, eps_inf, w_p, gamma,
 ## retarded ellipsoid from Kong's notes
 ## ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+@functools.lru_cache(maxsize=128)
+def spheroid_geometric_factors(a_x, a_yz):
+    ''' Static geometric factors 'L' and dynamic geometric factors 'D'
+        of a spheroid with symmetry axis along x, for the quasistatic and
+        retarded polarizabilities of Moroz, A. J. Opt. Soc. Am. B 26, 517.
+        Depends only on the shape, so results are cached across spectra.
+
+        Returns tuple (L_x, L_yz, D_x, D_yz).
+        '''
+    if a_x > a_yz:
+        ## Use prolate result
+        e = np.sqrt(a_x**2 - a_yz**2)/a_x
+        L_x = (1-e**2)/e**3 * (-e + np.arctanh(e))
+        D_x = 3/4 * (((1+e**2)/(1-e**2))*L_x + 1)
+        D_yz = (a_yz/(2*a_x))*(3/e * np.arctanh(e) - D_x)
+    elif a_x < a_yz:
+        ## Use oblate spheroid result
+        e = np.sqrt(a_yz**2 - a_x**2)/a_yz
+        L_x = (1/e**2)*(1- (np.sqrt(1-e**2)/e)*np.arcsin(e))
+        D_x = 3/4 * ((1-2*e**2)*L_x + 1)
+        D_yz = (a_yz/(2*a_x))*(
+            3*np.sqrt(1-e**2)/e * np.arcsin(e) - D_x)
+    else:
+        raise ValueError(
+            "Spheroid radii are equal, use 'sparse_ret_sphere_polarizability'")
+    ## 1 - L_x = 2*L_yz
+    L_yz = (1 - L_x)/2.
+
+    return L_x, L_yz, D_x, D_yz
+
 def sparse_ret_prolate_spheroid_polarizability(
     eps,
     eps_b,
     a_x,
     a_yz,
     w,
-    isolate_mode=None):
+    isolate_mode=None,
+    dtype=complex):
     '''Follows Moroz, A. Depolarization field of spheroidal particles,
         J. Opt. Soc. Am. B 26, 517
         but differs in assuming that the long axis is x oriented
@@ -142,155 +223,62 @@ def sparse_ret_prolate_spheroid_polarizability(
             'short' : y and x axes for prolate sphereoid (a_x > a_yz) or
                 just z axis for oblate spheroid (a_x < a_yz)
 
+        Frequency dependence enters only through 'eps' and 'w', so arrays
+        of either return tensors of shape (..., 3, 3). 'dtype' sets the
+        precision of the returned tensor, e.g. np.complex64 for long
+        spectrum sweeps.
         '''
-    ### Define QS polarizability 'alphaR'
-    def alphaR_ii(i, a_x, a_yz):
-        ''' returns components of alpha in diagonal basis with a_x denoting
-            long axis
-        '''
-
-        alpha = ((a_x*a_yz**2.)/3) * (eps - eps_b)/(
-            eps_b + L_i(i,a_x,a_yz)*(eps-eps_b)
-            )
-
-        return alpha
-
-    ### Define static geometric factors 'L_i' and eccentricity 'ecc' required
-    ### for quasistatic alpha 'alphaR'
-    def L_i(i, a_x, a_yz):
-        ''' '''
-        def L_x(a_x, a_yz):
-            e = ecc(a_x, a_yz)
-
-            if a_x > a_yz:
-                ## Use prolate result
-                L = (1-e**2.)/e**3. * (-e + np.arctanh(e))
-            elif a_x < a_yz:
-                ## Use oblate spheroid result
-                L = (1/e**2.)*(1- (np.sqrt(1-e**2.)/e)*np.arcsin(e))
-
-            return L
-
-        def L_yz(a_x, a_yz):
-            ''' 1 - L_x = 2*L_yx '''
-            return (1 - L_x(a_x, a_yz))/2.
+    L_x, L_yz, D_x, D_yz = spheroid_geometric_factors(a_x, a_yz)
 
-        if i == 1:
-            L = L_x(a_x, a_yz)
-        elif (i == 2) or (i == 3):
-            L = L_yz(a_x, a_yz)
-
-        return L
-
-    def ecc(a_x, a_yz):
-        return np.sqrt(np.abs(a_x**2. - a_yz**2.)/max([a_x, a_yz])**2.)
-
-    ### Define retardation correction to alphaR
-    def alphaMW_ii(i, a_x, a_yz):
-        alphaR = alphaR_ii(i, a_x, a_yz)
-        k = w*np.sqrt(eps_b)/c
-
-        if i == 1:
-            l_E = a_x
-            D = D_x(a_x, a_yz)
-        elif (i == 2) or (i == 3):
-            l_E = a_yz
-            D = D_yz(a_x, a_yz)
-
-        alphaMW = alphaR/(
-            1
-            - (k**2./l_E) * D * alphaR
-            - 1j * ((2*k**3.)/3) * alphaR
-            )
-
-        return alphaMW
+    ### QS polarizability 'alphaR' along each axis
+    alphaR_x = ((a_x*a_yz**2)/3) * (eps - eps_b)/(
+        eps_b + L_x*(eps-eps_b)
+        )
+    alphaR_yz = ((a_x*a_yz**2)/3) * (eps - eps_b)/(
+        eps_b + L_yz*(eps-eps_b)
+        )
 
-    ### Define dynamic geometric factors 'D_i' for alphaMW
-    def D_x(a_x, a_yz):
-        e = ecc(a_x, a_yz)
-        if a_x > a_yz:
-            ## Use prolate result
-            D = 3/4 * (
-                ((1+e**2.)/(1-e**2.))*L_i(1, a_x, a_yz) + 1
-                )
-        elif a_x < a_yz:
-            ## Use oblate result
-            D = 3/4 * ((1-2*e**2.)*L_i(1, a_x, a_yz) + 1)
-        return D
-
-    def D_yz(a_x, a_yz):
-        e = ecc(a_x, a_yz)
-
-        if a_x > a_yz:
-            D = (a_yz/(2*a_x))*(3/e * np.arctanh(e) - D_x(a_x,a_yz))
-        elif a_x < a_yz:
-            D = (a_yz/(2*a_x))*(
-                3*np.sqrt(1-e**2.)/e * np.arcsin(e) - D_x(a_x,a_yz))
-
-        return D
+    ### Retardation correction to alphaR
+    k = w*np.sqrt(eps_b)/c
+    alphaMW_x = alphaR_x/(
+        1
+        - (k**2/a_x) * D_x * alphaR_x
+        - 1j * ((2*k**3)/3) * alphaR_x
+        )
+    alphaMW_yz = alphaR_yz/(
+        1
+        - (k**2/a_yz) * D_yz * alphaR_yz
+        - 1j * ((2*k**3)/3) * alphaR_yz
+        )
 
     if a_x > a_yz:
         ## For prolate spheroid, assign long axis to be x
-        alpha_11 = alphaMW_ii(1, a_x, a_yz)
-        alpha_22 = alphaMW_ii(2, a_x, a_yz)
-        alpha_33 = alphaMW_ii(3, a_x, a_yz)
+        alpha_diag = (alphaMW_x, alphaMW_yz, alphaMW_yz)
+        keep = isolate_mode_masks[isolate_mode]
     elif a_x < a_yz:
         ## For oblate spheroid, assign short axis to be z
-        alpha_11 = alphaMW_ii(2, a_x, a_yz)
-        alpha_22 = alphaMW_ii(2, a_x, a_yz)
-        alpha_33 = alphaMW_ii(1, a_x, a_yz)
-
-    if isolate_mode == None:                # (Zu Edit: is -> ==)
-        alpha_ij = np.array([[ alpha_11,       0.,       0.],
-                             [       0., alpha_22,       0.],
-                             [       0.,       0., alpha_33]])
-
-    elif isolate_mode == 'long':            # (Zu Edit: is -> ==)
-        if a_x > a_yz:
-            ## Keep only alpha_x for prolate
-            alpha_ij = np.array([
-                [ alpha_11,       0.,       0.],
-                [       0.,       0.,       0.],
-                [       0.,       0.,       0.]
-                ])
-        elif a_x < a_yz:
-            ## Keep alpha_x and #alpha_y for oblate
-            alpha_ij = np.array([
-                [ alpha_11,       0.,       0.],
-                [       0., alpha_22,       0.],
-                [       0.,       0.,       0.]
-                ])
-    elif (isolate_mode == 'short') or (isolate_mode == 'trans'):    # (Zu Edit: is -> ==)
-        if a_x > a_yz:
-            alpha_ij = np.array([
-                [       0.,       0.,       0.],
-                [       0., alpha_22,       0.],
-                [       0.,       0., alpha_33]
-                ])
-        elif a_x < a_yz:
-            alpha_ij = np.array([
-                [       0.,       0.,       0.],
-                [       0.,       0.,       0.],
-                [       0.,       0., alpha_33]
-                ])
+        alpha_diag = (alphaMW_yz, alphaMW_yz, alphaMW_x)
+        keep = oblate_isolate_mode_masks[isolate_mode]
 
+    alpha_ij = masked_diagonal_tensor(alpha_diag, keep, dtype)
 
     return alpha_ij
 
 
 
 def sparse_ret_prolate_spheroid_polarizability_Drude(w, eps_inf, w_p, gamma,
-    eps_b, a_x, a_yz, isolate_mode=None):
+    eps_b, a_x, a_yz, isolate_mode=None, dtype=complex):
     ''' '''
     return sparse_ret_prolate_spheroid_polarizability(
-       drude_model(w, eps_inf, w_p, gamma), eps_b, a_x, a_yz, w, isolate_mode)
+       drude_model(w, eps_inf, w_p, gamma), eps_b, a_x, a_yz, w, isolate_mode,
+       dtype=dtype)
 
 # For parameterization by spectra fit or modeling spectra
 def sigma_prefactor(w, eps_b):
     """ added for debugging on 02/20/19 """
     n_b = np.sqrt(eps_b)
     prefac = (
-        (8*np.pi/3)*(w * n_b/ c)**4.
+        (8*np.pi/3)*(w * n_b/ c)**4
         /(
         # 0.5
         # *
@@ -300,10 +288,13 @@ def sigma_prefactor(w, eps_b):
     return prefac
 
 def long_sigma_scat_ret_pro_ellip(w, eps_inf, w_p, gamma,
-    eps_b, a_x, a_yz):
-    ''''''
-    alpha = sparse_ret_prolate_spheroid_polarizability_Drude(
-        w, eps_inf, w_p, gamma, eps_b, a_x, a_yz)
+    eps_b, a_x, a_yz, eps=None):
+    ''' Pass 'eps' to reuse a dielectric function already evaluated
+        on 'w', in which case the Drude parameters are ignored.
+        '''
+    if eps is None:
+        eps = drude_model(w, eps_inf, w_p, gamma)
+    alpha = sparse_ret_prolate_spheroid_polarizability(eps, eps_b, a_x, a_yz, w)
 
     ## result I had as of 02/19/19, don't remember justification
     # sigma = (8*np.pi/3)*(w/c)**4.*np.sqrt(eps_b)**(-1)*(
@@ -312,15 +303,18 @@ def long_sigma_scat_ret_pro_ellip(w, eps_inf, w_p, gamma,
 
     ## simple fix, changing k -> w*n/c
     sigma = sigma_prefactor(w, eps_b) * (
-        np.abs(alpha[0,0])**2.
+        np.abs(alpha[...,0,0])**2
         )
     return sigma
 
 def short_sigma_scat_ret_pro_ellip(w, eps_inf, w_p, gamma,
-    eps_b, a_x, a_yz):
-    ''''''
-    alpha = sparse_ret_prolate_spheroid_polarizability_Drude(
-        w, eps_inf, w_p, gamma, eps_b, a_x, a_yz)
+    eps_b, a_x, a_yz, eps=None):
+    ''' Pass 'eps' to reuse a dielectric function already evaluated
+        on 'w', in which case the Drude parameters are ignored.
+        '''
+    if eps is None:
+        eps = drude_model(w, eps_inf, w_p, gamma)
+    alpha = sparse_ret_prolate_spheroid_polarizability(eps, eps_b, a_x, a_yz, w)
 
     ## result I had as of 02/19/19, don't remember justification
     # sigma = (8*np.pi/3)*(w/c)**4.*np.sqrt(eps_b)**(-1)*(
@@ -329,7 +323,7 @@ def short_sigma_scat_ret_pro_ellip(w, eps_inf, w_p, gamma,
 
     ## simple fix, changing k -> w*n/c
     sigma = sigma_prefactor(w, eps_b) * (
-        np.abs(alpha[2,2])**2.
+        np.abs(alpha[...,2,2])**2
         )
     return sigma
 
@@ -344,6 +338,7 @@ def sparse_ret_sphere_polarizability(
     a,
     w,
     isolate_mode=None,
+    dtype=complex,
     ):
 
     '''Follows Moroz, A. Depolarization field of spheroidal particles,
@@ -356,7 +351,7 @@ def sparse_ret_sphere_polarizability(
             long axis
         '''
 
-        alpha = ((a**3.)/3) * (eps - eps_b)/(
+        alpha = ((a**3)/3) * (eps - eps_b)/(
             eps_b + (1/3)*(eps-eps_b)
             )
 
@@ -371,22 +366,22 @@ def sparse_ret_sphere_polarizability(
         alphaMW = alphaR/(
             1
             -
-            ((k**2./a) * alphaR)
+            ((k**2/a) * alphaR)
             -
-            (1j * ((2*k**3.)/3) * alphaR)
+            (1j * ((2*k**3)/3) * alphaR)
             )
 
         return alphaMW
 
-    alpha_11 = alphaMW_ii(1, a)
-    alpha_22 = alphaMW_ii(2, a)
-    alpha_33 = alphaMW_ii(3, a)
+    ## Sphere is isotropic, so compute the diagonal component once
+    alpha = alphaMW_ii(1, a)
 
     alpha_tensor = distribute_sphere_alpha_components_into_tensor(
-        alpha_11,
-        alpha_22,
-        alpha_33,
+        alpha,
+        alpha,
+        alpha,
         isolate_mode,
+        dtype=dtype,
         )
 
     return alpha_tensor
@@ -398,6 +393,7 @@ def sparse_sphere_polarizability_TMatExp(
     a,
     w,
     isolate_mode=None,
+    dtype=complex,
     ):
 
     '''Follows Moroz, A. Depolarization field of spheroidal particles,
@@ -415,22 +411,22 @@ def sparse_sphere_polarizability_TMatExp(
         alpha = (eps_r - 1)/(
             eps_r + 2
             -
-            (6*eps_r - 12)*(ka**2./10)
+            (6*eps_r - 12)*(ka**2/10)
             -
-            1j*(2*ka**3./3)*(eps_r - 1)
-            ) * a**3.
+            1j*(2*ka**3/3)*(eps_r - 1)
+            ) * a**3
 
         return alpha
 
-    alpha_11 = alphaTME_ii(a)
-    alpha_22 = alphaTME_ii(a)
-    alpha_33 = alphaTME_ii(a)
+    ## Sphere is isotropic, so compute the diagonal component once
+    alpha = alphaTME_ii(a)
 
     alpha_tensor = distribute_sphere_alpha_components_into_tensor(
-        alpha_11,
-        alpha_22,
-        alpha_33,
+        alpha,
+        alpha,
+        alpha,
         isolate_mode,
+        dtype=dtype,
         )
 
     return alpha_tensor
@@ -442,60 +438,49 @@ def sparse_sphere_polarizability_Mie(
     a,
     w,
     isolate_mode=None,
+    dtype=complex,
     ):
 
     ''' Polarizability that results from the exact dipole Mie coefficient.
         '''
-    def alphaTME_ii(a):
-        ''' returns components of alpha in diagonal basis '''
-        eps_r = eps / eps_b
-        m = np.sqrt(eps_r)
-        k = w*np.sqrt(eps_b)/c
-        x = k*a
-
-        j1x = spl.spherical_jn(1,x)
-        xj1x_prime = (
-            spl.spherical_jn(1,x) +
-            x*spl.spherical_jn(1,x, derivative=True)
-            )
-
-        j1mx = spl.spherical_jn(1,m*x)
-        mxj1mx_prime = (
-            spl.spherical_jn(1,m*x) +
-            m*x*spl.spherical_jn(1,m*x, derivative=True)
-            )
-
-        def h1(x, der):
-            return (
-                spl.spherical_jn(1, x, derivative=der)
-                +
-                1j*spl.spherical_yn(1, x, derivative=der)
-                )
-        h1x = h1(x, False)
-        xh1x_prime = (
-            h1(x, False) +
-            x*h1(x, True)
-            )
-
-        a_mie =(
-            (m**2.*j1mx*xj1x_prime - j1x*mxj1mx_prime)
-            /
-            (m**2.*j1mx*xh1x_prime - h1x*mxj1mx_prime)
-            )
-
-        alpha = 1j*3/(2*k**3.)*a_mie
-
-        return alpha
+    eps_r = eps / eps_b
+    m = np.sqrt(eps_r)
+    k = w*np.sqrt(eps_b)/c
+    ## Size parameters on the frequency axis, shared by every Bessel call
+    x = k*a
+    mx = m*x
+
+    ## Evaluate each Bessel function once over the whole frequency axis
+    j1x = spl.spherical_jn(1,x)
+    j1x_prime = spl.spherical_jn(1,x, derivative=True)
+    j1mx = spl.spherical_jn(1,mx)
+    j1mx_prime = spl.spherical_jn(1,mx, derivative=True)
+    y1x = spl.spherical_yn(1,x)
+    y1x_prime = spl.spherical_yn(1,x, derivative=True)
+
+    xj1x_prime = j1x + x*j1x_prime
+    mxj1mx_prime = j1mx + mx*j1mx_prime
+
+    ## Spherical Hankel function of the first kind
+    h1x = j1x + 1j*y1x
+    xh1x_prime = h1x + x*(j1x_prime + 1j*y1x_prime)
+
+    ## m**2 = eps_r
+    a_mie =(
+        (eps_r*j1mx*xj1x_prime - j1x*mxj1mx_prime)
+        /
+        (eps_r*j1mx*xh1x_prime - h1x*mxj1mx_prime)
+        )
 
-    alpha_11 = alphaTME_ii(a)
-    alpha_22 = alphaTME_ii(a)
-    alpha_33 = alphaTME_ii(a)
+    ## Sphere is isotropic, so compute the diagonal component once
+    alpha = 1j*3/(2*k**3)*a_mie
 
     alpha_tensor = distribute_sphere_alpha_components_into_tensor(
-        alpha_11,
-        alpha_22,
-        alpha_33,
+        alpha,
+        alpha,
+        alpha,
         isolate_mode,
+        dtype=dtype,
         )
 
     return alpha_tensor
@@ -505,64 +490,37 @@ def distribute_sphere_alpha_components_into_tensor(
     alpha_11,
     alpha_22,
     alpha_33,
-    isolate_mode):
-
-    ## Reorganize matrix dimensions if multiple frequencies given
-    if type(alpha_11) is np.ndarray and alpha_11.size > 1:
-        alpha_11 = alpha_11[..., None, None]
-    if type(alpha_22) is np.ndarray and alpha_22.size > 1:
-        alpha_22 = alpha_22[..., None, None]
-    if type(alpha_33) is np.ndarray and alpha_33.size > 1:
-        alpha_33 = alpha_33[..., None, None]
-
-    if isolate_mode == None:
-        alpha_ij = (
-            alpha_11 * np.array([
-                [1.,0.,0.],
-                [0.,0.,0.],
-                [0.,0.,0.]
-                ])
-            +
-            alpha_22 * np.array([
-                [0.,0.,0.],
-                [0.,1.,0.],
-                [0.,0.,0.]
-                ])
-            +
-            alpha_33 * np.array([
-                [0.,0.,0.],
-                [0.,0.,0.],
-                [0.,0.,1.]
-                ])
-            )
-    elif isolate_mode == 'long':
-        alpha_ij = (
-            alpha_11 * np.array([
-                [1.,0.,0.],
-                [0.,0.,0.],
-                [0.,0.,0.]
-                ])
-            )
-    elif (isolate_mode == 'short') or (isolate_mode == 'trans'):
-        alpha_ij = (
-            alpha_22 * np.array([
-                [0.,0.,0.],
-                [0.,1.,0.],
-                [0.,0.,0.]
-                ])
-            +
-            alpha_33 * np.array([
-                [0.,0.,0.],
-                [0.,0.,0.],
-                [0.,0.,1.]
-                ])
-            )
+    isolate_mode,
+    dtype=None):
+    ''' Diagonal tensor of shape (..., 3, 3) from the components, stored
+        as 'dtype' if given and the components' common type otherwise.
+        '''
+    alpha_ij = masked_diagonal_tensor(
+        (alpha_11, alpha_22, alpha_33),
+        isolate_mode_masks[isolate_mode],
+        dtype)
+
+    return alpha_ij
+
+
+def masked_diagonal_tensor(alpha_diag, keep, dtype=None):
+    ''' Diagonal tensor of shape (..., 3, 3) from the three components in
+        'alpha_diag', zeroing those where the boolean mask 'keep' is False.
+        Frequency dimensions of the components, of any rank, lead the
+        tensor dimensions.
+        '''
+    alpha_diag = np.stack(np.broadcast_arrays(*alpha_diag), axis=-1)
+    if dtype is None:
+        dtype = np.result_type(alpha_diag, 1.)
+
+    alpha_ij = np.zeros(alpha_diag.shape[:-1] + (3, 3), dtype=dtype)
+    alpha_ij[..., [0, 1, 2], [0, 1, 2]] = np.where(keep, alpha_diag, 0)
 
     return alpha_ij
 
 
 def sparse_TMatExp_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
-    eps_b, a, isolate_mode=None):
+    eps_b, a, isolate_mode=None, dtype=complex):
     ''' '''
     return sparse_sphere_polarizability_TMatExp(
        drude_model(w, eps_inf, w_p, gamma),
@@ -570,11 +528,12 @@ def sparse_TMatExp_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
        a,
        w,
        isolate_mode,
+       dtype=dtype,
        )
 
 
 def sparse_Mie_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
-    eps_b, a, isolate_mode=None):
+    eps_b, a, isolate_mode=None, dtype=complex):
     ''' '''
     return sparse_sphere_polarizability_Mie(
        drude_model(w, eps_inf, w_p, gamma),
@@ -582,11 +541,12 @@ def sparse_Mie_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
        a,
        w,
        isolate_mode,
+       dtype=dtype,
        )
 
 
 def sparse_ret_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
-    eps_b, a, isolate_mode=None):
+    eps_b, a, isolate_mode=None, dtype=complex):
     ''' '''
     return sparse_ret_sphere_polarizability(
        drude_model(w, eps_inf, w_p, gamma),
@@ -594,6 +554,7 @@ def sparse_ret_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
        a,
        w,
        isolate_mode,
+       dtype=dtype,
        )
 
 
@@ -602,10 +563,13 @@ def sparse_ret_sphere_polarizability_Drude(w, eps_inf, w_p, gamma,
 ## ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def sigma_scat_ret_sphere(w, eps_inf, w_p, gamma,
-    eps_b, a,):
-    ''''''
-    alpha = sparse_ret_sphere_polarizability_Drude(
-        w, eps_inf, w_p, gamma, eps_b, a)
+    eps_b, a, eps=None):
+    ''' Pass 'eps' to reuse a dielectric function already evaluated
+        on 'w', in which case the Drude parameters are ignored.
+        '''
+    if eps is None:
+        eps = drude_model(w, eps_inf, w_p, gamma)
+    alpha = sparse_ret_sphere_polarizability(eps, eps_b, a, w)
 
     ## result I had as of 02/19/19, don't remember justification
     # sigma = (8*np.pi/3)*(w/c)**4.*np.sqrt(eps_b)**(-1)*(
@@ -614,15 +578,18 @@ def sigma_scat_ret_sphere(w, eps_inf, w_p, gamma,
 
     ## simple fix, changing k -> w*n/c
     sigma = sigma_prefactor(w, eps_b) * (
-        np.abs(alpha[...,0,0])**2.
+        np.abs(alpha[...,0,0])**2
         )
     return sigma
 
 def sigma_scat_Mie_sphere(w, eps_inf, w_p, gamma,
-    eps_b, a,):
-    ''''''
-    alpha = sparse_Mie_sphere_polarizability_Drude(
-        w, eps_inf, w_p, gamma, eps_b, a)
+    eps_b, a, eps=None):
+    ''' Pass 'eps' to reuse a dielectric function already evaluated
+        on 'w', in which case the Drude parameters are ignored.
+        '''
+    if eps is None:
+        eps = drude_model(w, eps_inf, w_p, gamma)
+    alpha = sparse_sphere_polarizability_Mie(eps, eps_b, a, w)
 
     ## result I had as of 02/19/19, don't remember justification
     # sigma = (8*np.pi/3)*(w/c)**4.*np.sqrt(eps_b)**(-1)*(
@@ -631,15 +598,18 @@ def sigma_scat_Mie_sphere(w, eps_inf, w_p, gamma,
 
     ## simple fix, changing k -> w*n/c
     sigma = sigma_prefactor(w, eps_b) * (
-        np.abs(alpha[...,0,0])**2.
+        np.abs(alpha[...,0,0])**2
         )
     return sigma
 
 def sigma_scat_TMatExp_sphere(w, eps_inf, w_p, gamma,
-    eps_b, a,):
-    ''''''
-    alpha = sparse_TMatExp_sphere_polarizability_Drude(
-        w, eps_inf, w_p, gamma, eps_b, a)
+    eps_b, a, eps=None):
+    ''' Pass 'eps' to reuse a dielectric function already evaluated
+        on 'w', in which case the Drude parameters are ignored.
+        '''
+    if eps is None:
+        eps = drude_model(w, eps_inf, w_p, gamma)
+    alpha = sparse_sphere_polarizability_TMatExp(eps, eps_b, a, w)
 
     ## result I had as of 02/19/19, don't remember justification
     # sigma = (8*np.pi/3)*(w/c)**4.*np.sqrt(eps_b)**(-1)*(
@@ -648,7 +618,7 @@ def sigma_scat_TMatExp_sphere(w, eps_inf, w_p, gamma,
 
     ## simple fix, changing k -> w*n/c
     sigma = sigma_prefactor(w, eps_b) * (
-        np.abs(alpha[...,0,0])**2.
+        np.abs(alpha[...,0,0])**2
         )
     return sigma
 
@@ -689,6 +659,7 @@ def dipole_mags_gened(
     alpha1_diag=None,
     n_b=None,
     drive_amp=None,
+    dtype=complex,
     ):
     """ Calculate dipole magnitudes with generalized dyadic
         polarizabilities.
@@ -698,6 +669,9 @@ def dipole_mags_gened(
 
         Assumes 3D dipoles when 'mol_angle' is 2 dimensional,
         interpreted as a list of (theta, phi) coordinate pairs.
+
+        The coupled system is solved at precision 'dtype', np.complex64
+        halves the memory traffic of large spectrum sweeps.
         """
 
 
@@ -711,16 +685,19 @@ def dipole_mags_gened(
         )
 
     alpha_1_p1 = alpha1_diag
-    alpha_1 = rotation_by(-phi_1) @ alpha_1_p1 @ rotation_by(phi_1)
+    alpha_1 = rotate_diag_z(alpha_1_p1, phi_1).astype(dtype, copy=False)
+    alpha_0 = alpha_0.astype(dtype, copy=False)
+    E_drive = np.asarray(E_drive).astype(dtype, copy=False)
 
-    G_d = G(drive_hbar_w, d_col, n_b)
+    G_d = G(drive_hbar_w, d_col, n_b, dtype=dtype)
 
-    geometric_coupling_01 = np.linalg.inv(
-        np.identity(3) - alpha_0 @ G_d @ alpha_1 @ G_d
+    ## Solve the coupled system for p0 instead of inverting the geometric
+    ## coupling matrix.
+    p0 = solve_3x3(
+        add_to_diagonal(-(alpha_0 @ G_d @ alpha_1 @ G_d), 1),
+        matvec(alpha_0, E_drive)
         )
-
-    p0 = np.einsum('...ij,...j->...i',geometric_coupling_01 @ alpha_0, E_drive)
-    p1 = np.einsum('...ij,...j->...i',alpha_1 @ G_d, p0)
+    p1 = matvec(alpha_1, matvec(G_d, p0))
 
     return [p0, p1]
 
@@ -736,12 +713,13 @@ def plas_dip_driven_by_mol(
     alpha1_diag=None,
     n_b=None,
     drive_amp=1,
+    dtype=complex,
     ):
     """ Calculate dipole magnitudes with generalized dyadic
         polarizabilities.
 
         Returns dipole moment vecotrs as rows in array of shape
-        (# of seperations, 3).
+        (# of seperations, 3), at precision 'dtype'.
         """
 
     # Initialize unit vector for molecule dipole in lab frame
@@ -753,7 +731,7 @@ def plas_dip_driven_by_mol(
     if E_d_angle == None:
         E_d_angle = mol_angle
     # rotate driving field into lab frame
-    E_drive = rotation_by(E_d_angle) @ np.array([1,0,0])*drive_amp
+    E_drive = rotate_x_hat_z(E_d_angle)*drive_amp
 
     ## Build 3D molecule dipole moments
     if mol_dipole_mag.ndim != 1:            # (Zu Edit: is not -> !=)
@@ -763,23 +741,22 @@ def plas_dip_driven_by_mol(
     num_dips_for_calc = len(mol_dipole_mag)
 
     ## Creat diagonal polarizability for molecule
-    alpha0_diag = np.zeros((num_dips_for_calc, 3, 3), dtype=np.complex_)
+    alpha0_diag = np.zeros((num_dips_for_calc, 3, 3), dtype=dtype)
     alpha0_diag[..., 0, 0] = mol_dipole_mag/drive_amp
     ## Rotate molecule dipoles according to given angle
-    alpha_0 = rotation_by(-phi_0) @ alpha0_diag @ rotation_by(phi_0)
+    alpha_0 = rotate_diag_z(alpha0_diag, phi_0).astype(dtype, copy=False)
 
     ## Rotate plasmon polarizability by given angle
-    alpha_1 = rotation_by(-phi_1) @ alpha1_diag @ rotation_by(phi_1)
+    alpha_1 = rotate_diag_z(alpha1_diag, phi_1).astype(dtype, copy=False)
+    E_drive = E_drive.astype(dtype, copy=False)
 
     ## Build coupling tensor
-    G_d = G(drive_hbar_w, d_col, n_b)
-
-    geometric_coupling_01 = np.linalg.inv(
-        np.identity(3) - alpha_0 @ G_d @ alpha_1 @ G_d
-        )
+    G_d = G(drive_hbar_w, d_col, n_b, dtype=dtype)
 
-    p0 = np.einsum('...ij,...j->...i',alpha_0, E_drive)
-    p1 = np.einsum('...ij,...j->...i',alpha_1 @ G_d, p0)
+    ## Molecule dipole is fixed by 'mol_dipole_mag', so no back-coupling
+    ## to solve for.
+    p0 = matvec(alpha_0, E_drive)
+    p1 = matvec(alpha_1, matvec(G_d, p0))
 
     return [p0, p1]
 
@@ -835,8 +812,168 @@ def rotation_by(by_angle, rot_axis='z'):
     return R
 
 
+def rotate_x_hat_z(by_angle):
+    ''' Closed form of rotation_by(by_angle) @ np.array([1,0,0]), the unit
+        vector in the x-y plane at 'by_angle' from the x axis, without
+        building the rotation matrices.
+        '''
+    if type(by_angle)==np.ndarray or type(by_angle)==list:
+        by_angle = np.ravel(by_angle)
+
+    x_hat = np.zeros(np.shape(by_angle) + (3,))
+    x_hat[..., 0] = np.cos(by_angle)
+    x_hat[..., 1] = np.sin(by_angle)
+
+    return x_hat
+
+
+def rotate_tensor(alpha, by_angle, rot_axis='z'):
+    ''' rotation_by(-by_angle) @ alpha @ rotation_by(by_angle) for general
+        tensors 'alpha', using that rotation_by(-by_angle) is the transpose
+        of rotation_by(by_angle) so the trig is evaluated once.
+        '''
+    R = rotation_by(by_angle, rot_axis)
+
+    return np.swapaxes(R, -1, -2) @ alpha @ R
+
+
+def rotate_diag_z(alpha_diag, by_angle):
+    ''' Closed form of
+            rotation_by(-by_angle) @ alpha_diag @ rotation_by(by_angle)
+        for diagonal tensors 'alpha_diag' of shape (..., 3, 3), written
+        directly into the output without building rotation matrices.
+        Off diagonal elements of 'alpha_diag' are assumed zero.
+        '''
+    if type(by_angle)==np.ndarray or type(by_angle)==list:
+        by_angle = np.ravel(by_angle)
+    cosines = np.cos(by_angle)
+    sines = np.sin(by_angle)
+
+    a_xx = alpha_diag[..., 0, 0]
+    a_yy = alpha_diag[..., 1, 1]
+    a_zz = alpha_diag[..., 2, 2]
+
+    alpha = np.zeros(
+        np.broadcast(cosines, a_xx).shape + (3, 3),
+        dtype=np.result_type(alpha_diag, cosines))
+    alpha[..., 0, 0] = a_xx*cosines**2 + a_yy*sines**2
+    alpha[..., 0, 1] = (a_yy - a_xx)*cosines*sines
+    alpha[..., 1, 0] = alpha[..., 0, 1]
+    alpha[..., 1, 1] = a_xx*sines**2 + a_yy*cosines**2
+    alpha[..., 2, 2] = a_zz
+
+    return alpha
+
+
+def rotate_diag_y(alpha_diag, by_angle):
+    ''' Closed form of
+            rotation_by(-by_angle, 'y') @ alpha_diag @ rotation_by(by_angle, 'y')
+        for diagonal tensors 'alpha_diag', see 'rotate_diag_z'.
+        '''
+    if type(by_angle)==np.ndarray or type(by_angle)==list:
+        by_angle = np.ravel(by_angle)
+    cosines = np.cos(by_angle)
+    sines = np.sin(by_angle)
+
+    a_xx = alpha_diag[..., 0, 0]
+    a_yy = alpha_diag[..., 1, 1]
+    a_zz = alpha_diag[..., 2, 2]
+
+    alpha = np.zeros(
+        np.broadcast(cosines, a_xx).shape + (3, 3),
+        dtype=np.result_type(alpha_diag, cosines))
+    alpha[..., 0, 0] = a_xx*cosines**2 + a_zz*sines**2
+    alpha[..., 0, 2] = (a_xx - a_zz)*cosines*sines
+    alpha[..., 2, 0] = alpha[..., 0, 2]
+    alpha[..., 2, 2] = a_xx*sines**2 + a_zz*cosines**2
+    alpha[..., 1, 1] = a_yy
+
+    return alpha
+
+
+
+def matvec(M, v):
+    ''' Batched matrix-vector product M @ v for 'M' of shape (..., 3, 3)
+        and 'v' of shape (..., 3), with broadcast leading dimensions.
+        '''
+    return (M @ v[..., None])[..., 0]
+
+
+def add_to_diagonal(M, value):
+    ''' Adds 'value' to the diagonal of the (..., 3, 3) array 'M' in place
+        and returns it, e.g. I + M without a temporary for the sum.
+        '''
+    M[..., [0, 1, 2], [0, 1, 2]] += value
+
+    return M
+
+
+def cofactors_3x3(A):
+    ''' Cofactor matrix and determinant of 3x3 'A', written out
+        elementwise so batches of small matrices avoid the per matrix
+        LAPACK overhead of np.linalg.
+
+        Arg details:
+            A.shape : (..., 3, 3)
+
+        Returns: cofactors C_ij with shape (..., 3, 3), det with shape (...)
+        '''
+    C = np.empty(np.shape(A), dtype=np.result_type(A, 1.))
+    C[..., 0, 0] = A[..., 1, 1]*A[..., 2, 2] - A[..., 1, 2]*A[..., 2, 1]
+    C[..., 0, 1] = A[..., 1, 2]*A[..., 2, 0] - A[..., 1, 0]*A[..., 2, 2]
+    C[..., 0, 2] = A[..., 1, 0]*A[..., 2, 1] - A[..., 1, 1]*A[..., 2, 0]
+    C[..., 1, 0] = A[..., 0, 2]*A[..., 2, 1] - A[..., 0, 1]*A[..., 2, 2]
+    C[..., 1, 1] = A[..., 0, 0]*A[..., 2, 2] - A[..., 0, 2]*A[..., 2, 0]
+    C[..., 1, 2] = A[..., 0, 1]*A[..., 2, 0] - A[..., 0, 0]*A[..., 2, 1]
+    C[..., 2, 0] = A[..., 0, 1]*A[..., 1, 2] - A[..., 0, 2]*A[..., 1, 1]
+    C[..., 2, 1] = A[..., 0, 2]*A[..., 1, 0] - A[..., 0, 0]*A[..., 1, 2]
+    C[..., 2, 2] = A[..., 0, 0]*A[..., 1, 1] - A[..., 0, 1]*A[..., 1, 0]
+
+    det = (
+        A[..., 0, 0]*C[..., 0, 0]
+        + A[..., 0, 1]*C[..., 0, 1]
+        + A[..., 0, 2]*C[..., 0, 2]
+        )
+
+    return C, det
+
+
+def _raise_if_singular(det):
+    ''' Matches np.linalg on singular matrices. '''
+    if np.any(det == 0):
+        raise np.linalg.LinAlgError("Singular matrix")
+
+
+def solve_3x3(A, b):
+    ''' Solves A @ x = b for 3x3 'A' by Cramer's rule.
+
+        Arg details:
+            A.shape : (..., 3, 3)
+            b.shape : (..., 3), leading dimensions broadcast with 'A'
+
+        Raises np.linalg.LinAlgError for a singular 'A', like
+        np.linalg.solve.
+        '''
+    C, det = cofactors_3x3(A)
+    _raise_if_singular(det)
+
+    ## x = adj(A) @ b / det, with adj(A) the transposed cofactor matrix
+    return np.einsum('...ji,...j->...i', C, b) / det[..., None]
+
+
+def inv_3x3(A):
+    ''' Closed form inverse adj(A)/det(A) of 3x3 'A' with shape (..., 3, 3).
+        Raises np.linalg.LinAlgError for a singular 'A', like np.linalg.inv.
+        '''
+    C, det = cofactors_3x3(A)
+    _raise_if_singular(det)
+
+    return np.swapaxes(C, -1, -2) / det[..., None, None]
+
+
+
 ## define coupling diad
-def G(drive_hbar_w, d_col, n_b):
+def G(drive_hbar_w, d_col, n_b, dtype=complex):
     ''' Dipole relay tensor at frequency 'drive_hbar_w'/hbar, evaluated
         at point specified by vector 'd_col' assuming the source dipole \
         at origin. Background index is determined by
@@ -844,37 +981,72 @@ def G(drive_hbar_w, d_col, n_b):
         Arg details:
             d_col.shape : shape = (...,3) -> interpretable as ...
                 number of row vectors.
+            drive_hbar_w : scalar or spectrum. For a single seperation the
+                result has shape (N_omega, 3, 3), otherwise the frequency
+                axes lead the seperation axes, (N_omega, N_sep, 3, 3).
+            dtype : complex type of the returned tensor.
+        '''
+    w = drive_hbar_w/hbar
+    k = w * n_b / c
+
+    ## Frequency axes go in front of the seperation and tensor axes
+    if np.size(d_col) == 3:
+        k_shape = np.shape(k) + (1, 1)
+    else:
+        k_shape = np.shape(k) + (1,)*(np.ndim(d_col) - 1) + (1, 1)
+    return G_of_k(np.reshape(k, k_shape), d_col, dtype=dtype)
+
+
+def G_of_k(k, d_col, dtype=complex):
+    ''' Dipole relay tensor for background wave vector 'k', evaluated at
+        point specified by vector 'd_col' assuming the source dipole at
+        origin.
+
+        Does no reshaping of 'k', so spectrum loops can shape it once and
+        reuse it.
+
+        Arg details:
+            k : scalar, or shaped to broadcast against (...,1,1) where
+                '...' are the leading dimensions of 'd_col', e.g.
+                (N_omega,1,1) for a spectrum at a single seperation.
+            d_col.shape : shape = (...,3), component major data of shape
+                (3, N) can be passed as its transpose and is made row
+                contiguous once here.
+            dtype : complex type of the returned tensor, the inputs are
+                cast to the matching precision so the arithmetic stays in it.
         '''
+    real_dtype = np.finfo(dtype).dtype
+    d_col = np.ascontiguousarray(d_col, dtype=real_dtype)
+    k = np.asarray(k)
+    k = k.astype(dtype if np.iscomplexobj(k) else real_dtype, copy=False)
 
     d = vec_mag(d_col) ## returns shape = (...,1), preserves dimension
     n_hat = d_col/d ## returns shape = (...,3)
-
-    w = drive_hbar_w/hbar
-    k = w * n_b / c
+    d = d[..., None] ## shape = (...,1,1)
 
     dyad = np.einsum('...i,...j->...ij',n_hat,n_hat)
 
-    ## If 1 seperation is given, check if multable frequencies given for spectrum
-    if d.size != 1:                                     # (Zu Edit: is not -> !=)
-        d = d[...,None]
-    elif d.size == 1 and (type(k) is np.ndarray):       # (Zu Edit: is -> ==)
-        if k.size > 1:
-            k = k.reshape(((k.size,)+(dyad.ndim-1)*(1,)))
-
-    complex_phase_factor = np.exp(1j*k*d)
+    kd = k*d
+    if np.iscomplexobj(kd):
+        complex_phase_factor = np.exp(1j*kd)
+    else:
+        ## For real k, fill the phase from cos and sin directly rather than
+        ## through a complex 1j*k*d temporary and a complex exp.
+        complex_phase_factor = np.empty(np.shape(kd), dtype=dtype)
+        complex_phase_factor.real = np.cos(kd)
+        complex_phase_factor.imag = np.sin(kd)
+
+    ## Radial factors of the near/intermediate field term (3nn - I) and the
+    ## far field term (nn - I), shape (...,1,1). Collected so the tensor is
+    ##     G = (3*near - far) nn - (near - far) I
+    ## which needs a single pass over the dyad.
+    near_field_factor = complex_phase_factor*(1/d**3 - 1j*k/d**2)
+    far_field_factor = complex_phase_factor*(k**2/d)
 
     ## add all piences together to calculate coupling
-    g_dip_dip = (
-        # normalization
-        # *
-        (
-            complex_phase_factor*(
-                (3.*dyad - np.identity(3)) * (1/d**3.- 1j*k/d**2.)
-                -
-                (dyad - np.identity(3)) * (k**2./d)
-                )
-            )
-        )
+    g_dip_dip = (3.*near_field_factor - far_field_factor) * dyad
+    g_dip_dip[..., [0, 1, 2], [0, 1, 2]] -= (
+        near_field_factor - far_field_factor)[..., 0]
 
     return g_dip_dip
 
@@ -883,7 +1055,9 @@ def G(drive_hbar_w, d_col, n_b):
 def vec_mag(row_vecs):
     ''' Replace last dimension of array with normalized verion
         '''
-    vector_magnitudes = np.linalg.norm(row_vecs, axis=(-1))[:,None]  # breaks if mag == 0, ok?
+    ## Keeps any number of leading dimensions, so shape (...,3) -> (...,1)
+    vector_magnitudes = np.sqrt(
+        np.einsum('...i,...i->...', row_vecs, row_vecs))[..., None]  # breaks if mag == 0, ok?
     return vector_magnitudes
 
 
@@ -905,7 +1079,7 @@ def uncoupled_p0(
         E_d_angle=E_d_angle,
         drive_amp=drive_amp)
 
-    p0_unc = np.einsum('...ij,...j->...i', alpha_0, E_drive)
+    p0_unc = matvec(alpha_0, E_drive)
 
     if return_polarizability_tensor:
         return [p0_unc, alpha_0]
@@ -933,11 +1107,9 @@ def rotate_molecule(mol_angle, alpha0_diag, E_d_angle, drive_amp):
         ## Otherize start with an x oriented dipole
         E_drive = np.array([1, 0, 0])*drive_amp
         E_d_phi = E_d_angle
-    ## Perform aximuthal rotation
-    E_drive = rotation_by(E_d_phi) @ E_drive.T
-    ## Take out an extra dimension introduced by np.matmul
-    if E_drive.shape[-1] == 1:
-        E_drive = E_drive[..., 0]
+    ## Perform aximuthal rotation, one field vector per rotation when
+    ## tilted out of plane above.
+    E_drive = matvec(rotation_by(E_d_phi), E_drive)
 
     ## Build polarizability tensor for molecule
     alpha_0_p0 = alpha0_diag
@@ -945,29 +1117,20 @@ def rotate_molecule(mol_angle, alpha0_diag, E_d_angle, drive_amp):
     ## the 'mol_angle' arg.
     if np.asarray(mol_angle).ndim <= 1:
         phi_0 = mol_angle ## angle of bf_p0 in lab frame
+        ## Rotate molecule about the aximuthal axis
+        alpha_0 = rotate_diag_z(alpha_0_p0, phi_0)
     else:
         theta_0 = mol_angle[:, 0]
         phi_0 = mol_angle[:, 1]
         ## alpha0_diag arg assumes x axis is nonzero for molecule,
         ## so first it must be rotated back to z by rotating -pi/2
         ## about y-axis.
-        alpha_0_p0 = (
-            rotation_by(+np.pi/2, rot_axis='y')
-            @
-            alpha_0_p0
-            @
-            rotation_by(-np.pi/2, rot_axis='y')
-            )
+        alpha_0_p0 = rotate_diag_y(alpha_0_p0, -np.pi/2)
         ## Then we can rotate it by the given polar coordinates
-        alpha_0_p0 = (
-            rotation_by(-theta_0, rot_axis='y')
-            @
-            alpha_0_p0
-            @
-            rotation_by(+theta_0, rot_axis='y')
-            )
-    ## Then rotate molecule about the aximuthal axis (by default of rotation_by().
-    alpha_0 = rotation_by(-phi_0) @ alpha_0_p0 @ rotation_by(phi_0)
+        alpha_0_p0 = rotate_diag_y(alpha_0_p0, theta_0)
+        ## Then rotate molecule about the aximuthal axis (by default of
+        ## rotation_by(). Tensor is no longer diagonal, so rotate in full.
+        alpha_0 = rotate_tensor(alpha_0_p0, phi_0)
 
     return alpha_0, E_drive
 
@@ -1027,31 +1190,38 @@ def sigma_scat_coupled(
 
     p_0, p_1 = dipoles_moments_per_omega(omega)
 
-    G_d = G(drive_hbar_w, d_col, n_b)
+    G_d = G_of_k(np.reshape(k, np.shape(k)+(1, 1)), d_col)
 
-    interference_term = np.sum((
-        np.imag(p_0 * np.conj(np.einsum('...ij,...j->...i', G_d, p_1)))
-        +
-        np.imag(p_1 * np.conj(np.einsum('...ij,...j->...i', G_d, p_0)))
-        ), axis=1)
-    diag_term_0 = (2 / 3) * k**3 * np.abs(np.linalg.norm( p_0, axis=1 ))**2.
-    diag_term_1 = (2 / 3) * k**3 * np.abs(np.linalg.norm( p_1, axis=1 ))**2.
+    ## Since G is symmetric, the two cross terms
+    ##     Im[p_0 . (G p_1)^*] + Im[p_1 . (G p_0)^*]
+    ## combine to -2 Re[p_0 . Im(G) p_1^*], a single contraction.
+    interference_term = -2*np.real(np.einsum(
+        '...i,...ij,...j->...', p_0, G_d.imag, np.conj(p_1)))
+    rad_factor = (2 / 3) * k**3
+    diag_term_0 = rad_factor * np.sum(p_0.real**2 + p_0.imag**2, axis=1)
+    diag_term_1 = rad_factor * np.sum(p_1.real**2 + p_1.imag**2, axis=1)
 
-    sigma = (
-        (4 * np.pi * k  / np.abs(E_0)**2.)
-        *
-        (
-            interference_term
-            +
-            diag_term_0
-            +
-            diag_term_1
-            )
-        )/n_b
+    ## Shared by the total and the returned components
+    prefactor = 4 * np.pi * k / (n_b*np.abs(E_0)**2)
+
+    sigma = prefactor * (
+        interference_term
+        +
+        diag_term_0
+        +
+        diag_term_1
+        )
 
     return [sigma, np.array(
         [interference_term, diag_term_0, diag_term_1,]
-        )*(4 * np.pi * k  / (n_b*np.abs(E_0)**2.))]
+        )*prefactor]
+
+
+def imag_conj_dot(a, b):
+    ''' Im[a . b^*] summed over the last axis, from the real and imaginary
+        parts so no complex product or conjugate is allocated.
+        '''
+    return np.sum(a.imag*b.real - a.real*b.imag, axis=-1)
 
 
 def sigma_abs_coupled(
@@ -1073,9 +1243,10 @@ def sigma_abs_coupled(
             List[0] : coupled absorption crossection
             List[1:3] : first dipole contribution
             List[3:5] : second dipole contribution
-        """
-
 
+        'drive_hbar_w' may be a spectrum with 'alpha0_diag' and
+        'alpha1_diag' of shape (N_omega, 3, 3), evaluated in one call.
+        """
     omega = drive_hbar_w/hbar
     k = omega * n_b / c
 
@@ -1092,39 +1263,36 @@ def sigma_abs_coupled(
         return_polarizabilities=True
         )
 
-    alpha_0_inv = np.linalg.inv(alpha_0)
-    alpha_1_inv = np.linalg.inv(alpha_1)
-
-    interference_term_0 = np.sum((
-        np.imag(p_0 * np.conj(np.einsum('...ij,...j->...i', alpha_0_inv, p_0)))
-        # +
-        # np.imag(p_1 * np.conj(np.einsum('...ij,...j->...i', alpha_1_inv, p_1)))
-        ), axis=-1)
-    interference_term_1 = np.sum((
-        # np.imag(p_0 * np.conj(np.einsum('...ij,...j->...i', alpha_0_inv, p_0)))
-        # +
-        np.imag(p_1 * np.conj(np.einsum('...ij,...j->...i', alpha_1_inv, p_1)))
-        ), axis=-1)
-    diag_term_0 = (2 / 3) * k**3 * np.abs(np.linalg.norm( p_0, axis=-1 ))**2.
-    diag_term_1 = (2 / 3) * k**3 * np.abs(np.linalg.norm( p_1, axis=-1 ))**2.
+    ## Line k up with the leading (frequency, seperation) axes of p
+    k = np.reshape(k, np.shape(k) + (1,)*(np.ndim(p_0) - 1 - np.ndim(k)))
 
-    sigma = (
-        (4 * np.pi * (k)  / np.abs(drive_amp)**2.)
-        *
-        (
-            interference_term_0
-            +
-            interference_term_1
-            -
-            diag_term_0
-            -
-            diag_term_1
-            )
+    ## alpha^-1 p from a solve rather than an explicit inverse
+    alpha_0_inv_p_0 = solve_3x3(alpha_0, p_0)
+    alpha_1_inv_p_1 = solve_3x3(alpha_1, p_1)
+
+    ## Im[p . (alpha^-1 p)^*]
+    interference_term_0 = imag_conj_dot(p_0, alpha_0_inv_p_0)
+    interference_term_1 = imag_conj_dot(p_1, alpha_1_inv_p_1)
+    rad_factor = (2 / 3) * k**3
+    diag_term_0 = rad_factor * np.sum(p_0.real**2 + p_0.imag**2, axis=-1)
+    diag_term_1 = rad_factor * np.sum(p_1.real**2 + p_1.imag**2, axis=-1)
+
+    ## Shared by the total and the returned components
+    prefactor = 4 * np.pi * k / np.abs(drive_amp)**2
+
+    sigma = prefactor * (
+        interference_term_0
+        +
+        interference_term_1
+        -
+        diag_term_0
+        -
+        diag_term_1
         )
 
     return [sigma, np.array(
         [interference_term_0, diag_term_0, interference_term_1, diag_term_1,]
-        )*(4 * np.pi * (k)  / (np.abs(drive_amp)**2.))]
+        )*prefactor]
 
 def single_dip_sigma_scat(
     dipoles_moments_per_omega,
@@ -1141,10 +1309,10 @@ def single_dip_sigma_scat(
 
     p_0, = dipoles_moments_per_omega(omega)
 
-    diag_term_0 = (2 / 3) * k**3 * np.abs(np.linalg.norm( p_0, axis=1 ))**2.
+    diag_term_0 = (2 / 3) * k**3 * np.sum(p_0.real**2 + p_0.imag**2, axis=1)
 
     sigma = (
-        (4 * np.pi * k  / np.abs(E_0)**2.)
+        (4 * np.pi * k  / np.abs(E_0)**2)
         * diag_term_0
         /n_b
         )
@@ -1169,11 +1337,9 @@ def single_dip_absorption(
         return_polarizability_tensor=True,
         )
 
-    alpha_inv = np.linalg.inv(alpha)
+    alpha_inv_p = solve_3x3(alpha, p)
 
-    interference_term = np.sum((
-        np.imag(p * np.conj(np.einsum('...ij,...j->...i', alpha_inv, p)))
-        ), axis=-1)
+    interference_term = imag_conj_dot(p, alpha_inv_p)
 
     omega = drive_hbar_w/hbar
     k = omega * n_b / c
@@ -1183,11 +1349,11 @@ def single_dip_absorption(
         *
         k**3
         *
-        np.abs(np.linalg.norm( p, axis=-1 ))**2.
+        np.sum(p.real**2 + p.imag**2, axis=-1)
         )
 
     sigma = (
-        (4 * np.pi * (k) / np.abs(drive_amp)**2.)
+        (4 * np.pi * (k) / np.abs(drive_amp)**2)
         *
         (
             interference_term
@@ -1215,21 +1381,15 @@ def power_absorped(
     #     return_polarizability_tensor=True,
     #     )
 
-    alpha_inv = np.linalg.inv(alpha)
+    alpha_inv_p = solve_3x3(alpha, p)
 
-    interference_term = np.imag(
-        np.einsum(
-            '...j,...j->...',
-            p,
-            (np.conj(np.einsum('...ij,...j->...i', alpha_inv, p)))
-            )
-        )
+    interference_term = imag_conj_dot(p, alpha_inv_p)
 
 
     omega = drive_hbar_w/hbar
     k = omega * n_b / c
 
-    diag_term = (2 / 3) * k**3 * np.abs(np.linalg.norm( p, axis=-1 ))**2.
+    diag_term = (2 / 3) * k**3 * np.sum(p.real**2 + p.imag**2, axis=-1)
 
     sigma = (
         (omega/2)
@@ -1290,30 +1450,36 @@ def coupled_dip_mags_both_driven(
     if E_d_angle == None:
         E_d_angle = mol_angle
     # rotate driving field into lab frame
-    E_drive = rotation_by(E_d_angle) @ np.array([1,0,0])*drive_amp
+    E_drive = rotate_x_hat_z(E_d_angle)*drive_amp
 
 
     alpha_0_p0 = alpha0_diag
-    alpha_0 = rotation_by(-phi_0) @ alpha_0_p0 @ rotation_by(phi_0)
+    alpha_0 = rotate_diag_z(alpha_0_p0, phi_0)
 
     alpha_1_p1 = alpha1_diag
-    alpha_1 = rotation_by(-phi_1) @ alpha_1_p1 @ rotation_by(phi_1)
+    alpha_1 = rotate_diag_z(alpha_1_p1, phi_1)
 
-    G_d = G(drive_hbar_w, d_col, n_b)
+    ## For a spectrum at several seperations, line the frequency axis of
+    ## the polarizabilities up with that of G_d, (N_omega, N_sep, 3, 3).
+    if np.ndim(drive_hbar_w) and np.size(d_col) > 3:
+        sep_axes = (1,)*(np.ndim(d_col) - 1)
+        alpha_0 = alpha_0.reshape(alpha_0.shape[:-2] + sep_axes + (3, 3))
+        alpha_1 = alpha_1.reshape(alpha_1.shape[:-2] + sep_axes + (3, 3))
 
-    geometric_coupling_01 = np.linalg.inv(
-        np.identity(3) - alpha_0 @ G_d @ alpha_1 @ G_d
-        )
+    G_d = G(drive_hbar_w, d_col, n_b)
 
-    p0 = np.einsum(
-        '...ij,...j->...i',
-        geometric_coupling_01 @ (alpha_0 @ (np.identity(3) + G_d @ alpha_1)),
-        E_drive
-        )
-    p1 = np.einsum(
-        '...ij,...j->...i',
-        geometric_coupling_01 @ (alpha_1 @ (np.identity(3) + G_d @ alpha_0)),
-        E_drive
+    ## Coupled system
+    ##     (I - alpha_0 G_d alpha_1 G_d) p0 = alpha_0 @ (I + G_d @ alpha_1) @ E
+    ## and its twin for p1, with the right hand sides applied to the field
+    ## from right to left so every step is a mat-vec.
+    rhs_0 = matvec(alpha_0, E_drive + matvec(G_d, matvec(alpha_1, E_drive)))
+    rhs_1 = matvec(alpha_1, E_drive + matvec(G_d, matvec(alpha_0, E_drive)))
+
+    ## Both moments share the coupling matrix, so solve for them together
+    ## against a single set of its cofactors.
+    p0, p1 = solve_3x3(
+        add_to_diagonal(-(alpha_0 @ G_d @ alpha_1 @ G_d), 1),
+        np.stack(np.broadcast_arrays(rhs_0, rhs_1)),
         )
 
     if not return_polarizabilities:
@@ -1344,16 +1510,12 @@ def single_dip_mag_pw(
     if E_d_angle == None:
         E_d_angle = angle
     # rotate driving field into lab frame
-    E_drive = rotation_by(E_d_angle) @ np.array([1,0,0])*drive_amp
+    E_drive = rotate_x_hat_z(E_d_angle)*drive_amp
 
     alpha_0_p0 = alpha0_diag
-    alpha_0 = rotation_by(-phi_0) @ alpha_0_p0 @ rotation_by(phi_0)
+    alpha_0 = rotate_diag_z(alpha_0_p0, phi_0)
 
-    p0 = np.einsum(
-        '...ij,...j->...i',
-        alpha_0,
-        E_drive
-        )
+    p0 = matvec(alpha_0, E_drive)
 
     if not return_polarizabilities:
         return [p0,]
@@ -1362,6 +1524,35 @@ def single_dip_mag_pw(
         return [p0, alpha_0]
 
 
+@functools.lru_cache(maxsize=1024)
+def focused_beam_power(k, E_d_angle):
+    ''' Power in the focused dipole PSF beam of wave number 'k' and
+        polarization angle 'E_d_angle', integral of (c/8pi)|E|^2 dA over the
+        focal spot for unit drive amplitude. Cached since spectrum and beam
+        scan sweeps call it repeatedly with the same arguments.
+        '''
+    ## Gauss-Legendre nodes and weights on [-spot_size, spot_size] along
+    ## each axis. The integrand is smooth over the spot, so 32 nodes per
+    ## axis converge to machine precision.
+    spot_size = 2*np.pi/k
+    nodes, weights = np.polynomial.legendre.leggauss(32)
+    spot_space = spot_size*nodes
+    spot_weights = spot_size*weights
+    spot_mesh = np.meshgrid(spot_space, spot_space)
+    focal_spot_field = aff.E_field(
+        dipole_orientation_angle=E_d_angle,
+        xi=spot_mesh[0],
+        y=spot_mesh[1],
+        k=k
+        )
+    intensity = c/(8*np.pi) * np.sum(
+        focal_spot_field.real**2 + focal_spot_field.imag**2, axis=0)
+
+    beam_power = spot_weights @ intensity @ spot_weights
+
+    return beam_power
+
+
 def coupled_dip_mags_focused_beam(
     mol_angle,
     plas_angle,
@@ -1412,68 +1603,48 @@ def coupled_dip_mags_focused_beam(
         p0_position = p0_position[None, :]
     p1_position = p0_position - d_col
 
-    ## Buld focused beam profile
-    E_0 = aff.E_field(
-        dipole_orientation_angle=E_d_angle,
-        xi=beam_x_positions - p0_position[...,0],
-        y=0,
-        k=k
-        ).T*drive_amp
-    E_1 = aff.E_field(
-        dipole_orientation_angle=E_d_angle,
-        xi=beam_x_positions - p1_position[...,0],
-        y=0,
-        k=k
-        ).T*drive_amp
+    ## Buld focused beam profile at both dipoles with one field evaluation,
+    ## stacking the two sets of beam offsets on a leading axis.
+    xi = np.stack([
+        beam_x_positions - p0_position[...,0],
+        beam_x_positions - p1_position[...,0],
+        ])
+    E_0, E_1 = np.moveaxis(
+        aff.E_field(
+            dipole_orientation_angle=E_d_angle,
+            xi=xi,
+            y=0,
+            k=k
+            ),
+        0, -1)*drive_amp
 
     ## Normalize fields to correct beam intensity
-    spot_size = 2*np.pi/k
-    spot_space = np.linspace(-spot_size, spot_size, 500)
-    spot_mesh = np.meshgrid(spot_space, spot_space)
-    focal_spot_field = aff.E_field(
-        dipole_orientation_angle=E_d_angle,
-        xi=spot_mesh[0],
-        y=spot_mesh[1],
-        k=k
-        ).T
-    intensity_ofx = c/(8*np.pi) * np.sum(
-        focal_spot_field*np.conj(focal_spot_field), axis=-1)
-
-    area_image = (spot_space.max() - spot_space.min())**2.
-    num_pixels = len(spot_space)**2.
-    area_per_pixel = area_image / num_pixels
-
-    beam_power = np.sum(intensity_ofx)*area_per_pixel
+    beam_power = focused_beam_power(float(k), float(E_d_angle))
     ## integral of (c/8pi)|E|^2 dA = beam_power
     E_0 /= (beam_power)**0.5
     E_1 /= (beam_power)**0.5
 
     ## Rotate polarizabilities into connecting vector frame
     alpha_0_p0 = alpha0_diag
-    alpha_0 = rotation_by(-phi_0) @ alpha_0_p0 @ rotation_by(phi_0)
+    alpha_0 = rotate_diag_z(alpha_0_p0, phi_0)
 
     alpha_1_p1 = alpha1_diag
-    alpha_1 = rotation_by(-phi_1) @ alpha_1_p1 @ rotation_by(phi_1)
+    alpha_1 = rotate_diag_z(alpha_1_p1, phi_1)
 
     G_d = G(drive_hbar_w, d_col, n_b)
 
-    geometric_coupling_01 = np.linalg.inv(
-        np.identity(3) - alpha_0 @ G_d @ alpha_1 @ G_d
-        )
-
-    p0 = np.einsum(
-        '...ij,...j->...i',
-        geometric_coupling_01 @ alpha_0 @ (
-            np.identity(3) + G_d @ alpha_1
-            ),
-        E_0
-        )
-    p1 = np.einsum(
-        '...ij,...j->...i',
-        geometric_coupling_01 @ alpha_1 @ (
-            np.identity(3) + G_d @ alpha_0
-            ),
-        E_0
+    ## Coupled system
+    ##     (I - alpha_0 G_d alpha_1 G_d) p0 = alpha_0 @ (I + G_d @ alpha_1) @ E
+    ## and its twin for p1, with the right hand sides applied to the field
+    ## from right to left so every step is a mat-vec.
+    rhs_0 = matvec(alpha_0, E_0 + matvec(G_d, matvec(alpha_1, E_0)))
+    rhs_1 = matvec(alpha_1, E_0 + matvec(G_d, matvec(alpha_0, E_0)))
+
+    ## Both moments share the coupling matrix, so solve for them together
+    ## against a single set of its cofactors.
+    p0, p1 = solve_3x3(
+        add_to_diagonal(-(alpha_0 @ G_d @ alpha_1 @ G_d), 1),
+        np.stack(np.broadcast_arrays(rhs_0, rhs_1)),
         )
 
     if not return_polarizabilities:
@@ -1527,36 +1698,16 @@ def single_dip_mag_focused_beam(
         ).T*drive_amp
 
     ## Normalize fields to correct beam intensity
-    spot_size = 2*np.pi/k
-    spot_space = np.linspace(-spot_size, spot_size, 500)
-    spot_mesh = np.meshgrid(spot_space, spot_space)
-    focal_spot_field = aff.E_field(
-        dipole_orientation_angle=E_d_angle,
-        xi=spot_mesh[0],
-        y=spot_mesh[1],
-        k=k
-        ).T
-    intensity_ofx = c/(8*np.pi) * np.sum(
-        focal_spot_field*np.conj(focal_spot_field), axis=-1)
-
-    area_image = (spot_space.max() - spot_space.min())**2.
-    num_pixels = len(spot_space)**2.
-    area_per_pixel = area_image / num_pixels
-
-    beam_power = np.sum(intensity_ofx)*area_per_pixel
+    beam_power = focused_beam_power(float(k), float(E_d_angle))
     ## integral of (c/8pi)|E|^2 dA = beam_power
     E_0 /= (beam_power)**0.5
 
     ## Rotate polarizabilities into connecting vector frame
     alpha_0_p0 = alpha0_diag
-    alpha_0 = rotation_by(-phi_0) @ alpha_0_p0 @ rotation_by(phi_0)
+    alpha_0 = rotate_diag_z(alpha_0_p0, phi_0)
 
     ## Dipole mmoment
-    p0 = np.einsum(
-        '...ij,...j->...i',
-        alpha_0,
-        E_0
-        )
+    p0 = matvec(alpha_0, E_0)
 
     if not return_polarizabilities:
         return [p0]
@@ -1586,24 +1737,55 @@ def partial_scattering(
             hbar_w: drive energy
             n_b: background index
             E_0: beam field magnitude
+
+        Normalized like 'single_dip_sigma_scat', which it reproduces for
+        max_angle = pi.
         """
-    ## Define points on spheriacl section to evaluate fields
+    omega = hbar_w/hbar
+    k = omega * n_b / c
+
+    ## Define points on spheriacl section to evaluate fields. Fibonacci
+    ## lattice points are evenly spread, so each carries an equal share of
+    ## the solid angle of the cap.
     sph_coord_field_points = fib.fib_alg_k_filter(
         num_points=num_int_points,
         max_ang=max_angle
         )
-    # Convert spherical coordinates to Caresian.
-    cart_points_on_sph = fib.sphere_to_cart(
-        sph_coord_field_points[:,0],
-        sph_coord_field_points[:,1],
-        focal_l*np.ones(np.shape(sph_coord_field_points[:,0]))
+    thetas = sph_coord_field_points[:, 0]
+    phis = sph_coord_field_points[:, 1]
+    d_solid_angle = 2*np.pi*(1 - np.cos(max_angle)) / len(thetas)
+
+    ## Unit vectors to the field points, shape (num_points, 3)
+    r_hat = np.stack([
+        np.sin(thetas)*np.cos(phis),
+        np.sin(thetas)*np.sin(phis),
+        np.cos(thetas),
+        ], axis=-1)
+
+    ## Dipole fields E = G p at all points at once, shape
+    ## (..., num_points, 3) with any frequency axes leading.
+    p = np.asarray(p1_of_w(omega))[..., None, :]
+    G_field = G_of_k(
+        np.reshape(k, np.shape(k) + (1, 1, 1)),
+        focal_l*r_hat - x1
+        )
+    E = matvec(G_field, p)
+
+    ## Radial Poynting flux of the far field, H = n_b (r_hat x E), is
+    ## (c n_b/8pi)|r_hat x E|^2 = (c n_b/8pi)(|E|^2 - |r_hat . E|^2).
+    E_radial = np.sum(E*r_hat, axis=-1)
+    transverse_intensity = (
+        np.sum(E.real**2 + E.imag**2, axis=-1)
+        - (E_radial.real**2 + E_radial.imag**2)
         )
-    ## Define dipole fields
-    # E = G @ p
-    # H = ???
-    # S = E x H^*
 
     ## Integrate
+    scattered_power_on_I_0 = (
+        np.sum(transverse_intensity, axis=-1) * focal_l**2 * d_solid_angle
+        / np.abs(E_0)**2
+        )
+
+    return scattered_power_on_I_0/n_b
 
 
 
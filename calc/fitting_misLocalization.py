@@ -11,6 +11,10 @@ from __future__ import division
 import pdb
 import sys
 import os
+import copy
+import functools
+import logging
+import multiprocessing
 import yaml
 
 import numpy as np
@@ -28,6 +32,7 @@ from misloc_mispol_package import project_path
 ## plotting stuff
 import matplotlib.pyplot as plt
 import matplotlib as mpl
+from matplotlib.collections import LineCollection
 #
 ## colorbar stuff
 from mpl_toolkits import axes_grid1
@@ -41,18 +46,16 @@ from ..optics import anal_foc_diff_fields as afi
 from . import coupled_dipoles as cp
 from . import knn
 
+logger = logging.getLogger(__name__)
+
 ## Get path to directory for mispolariation mapping
 txt_file_path = project_path + '/txt'
 
-## Import physical constants
-phys_const_file_name = '/physical_constants.yaml'
 parameter_files_path = (
     project_path + '/param')
-opened_constant_file = open(
-    parameter_files_path+phys_const_file_name,
-    'r')
-#
-constants = yaml.load(opened_constant_file, Loader=yaml.SafeLoader) # (Zu Edit: Loader=yaml.SafeLoader)
+
+## Import physical constants, already loaded from yaml by 'coupled_dipoles'
+constants = cp.constants
 e = constants['physical_constants']['e']
 c = constants['physical_constants']['c']  # charge of electron in statcoloumbs
 hbar = constants['physical_constants']['hbar']
@@ -65,6 +68,13 @@ curly_nanorod_color_light = (241/255, 223/255, 182/255, 0.5)
 
 ## ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+## libyaml parser when PyYAML was built with it
+yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+## Parsed parameter files keyed on (path, modification time), so each class
+## initialized from the same file doesn't reparse it.
+_param_file_cache = {}
+
 def load_param_file(file_name):
     """ Load parameter .yaml"""
     ## Check/fix formatting
@@ -73,11 +83,57 @@ def load_param_file(file_name):
     if file_name[-5:] != '.yaml':
         # print(file_name[-5:])
         file_name = file_name+'.yaml'
-    ## Load
-    loaded_params = yaml.load(
-        open(parameter_files_path+file_name, 'r'),
-        Loader=yaml.SafeLoader) # (Zu Edit: Loader=yaml.SafeLoader)
-    return loaded_params
+    ## Load, reparsing only if the file changed since last time
+    path = parameter_files_path+file_name
+    key = (path, os.path.getmtime(path))
+    if key not in _param_file_cache:
+        with open(path, 'r') as opened_param_file:
+            _param_file_cache[key] = yaml.load(
+                opened_param_file,
+                Loader=yaml_loader) # (Zu Edit: Loader=yaml.SafeLoader)
+    ## Callers get their own copy to modify
+    return copy.deepcopy(_param_file_cache[key])
+
+@functools.lru_cache(maxsize=32)
+def _cached_observation_points(sensor_size, resolution):
+    """ Square observation grid across the sensor, spanning the centers of
+        the edge pixels. Shared between instances with the same optics, so
+        the arrays are read only.
+        """
+    image_width_pixel_cc = ( ## Image width minus 1 pixel
+        sensor_size - sensor_size/resolution)
+
+    obs_points = diffi.observation_points(
+        x_min=-image_width_pixel_cc/2,
+        x_max=image_width_pixel_cc/2,
+        y_min=-image_width_pixel_cc/2,
+        y_max=image_width_pixel_cc/2,
+        points=resolution
+        )
+    for points in obs_points:
+        points.flags.writeable = False
+    return obs_points
+
+def quench_ellipse_form(cos_rod, sin_rod, long_radius, short_radius):
+    """ Entries (M_xx, M_xy, M_yy) of the symmetric matrix for which a
+        point r lies outside the quenching ellipse when r.M.r > 1. With R
+        the rotation by the rod angle, M = R^T diag(1/a^2, 1/c^2) R.
+        """
+    inv_long_sqrd = 1/long_radius**2
+    inv_short_sqrd = 1/short_radius**2
+    M_xx = cos_rod**2*inv_long_sqrd + sin_rod**2*inv_short_sqrd
+    M_yy = sin_rod**2*inv_long_sqrd + cos_rod**2*inv_short_sqrd
+    M_xy = cos_rod*sin_rod*(inv_long_sqrd - inv_short_sqrd)
+    return M_xx, M_xy, M_yy
+
+@functools.lru_cache(maxsize=1)
+def load_angle_mapping():
+    """ Saved (true angle, observed angle) pairs for a single molecule in
+        the plane, parsed once and shared read only.
+        """
+    saved_mapping = np.loadtxt(txt_file_path+'/obs_pol_vs_true_angle.txt')
+    saved_mapping.flags.writeable = False
+    return saved_mapping
 
 class DipoleProperties(object):
     """ Will eventually call parameter file as argument, currently (02/07/19)
@@ -215,16 +271,21 @@ class DipoleProperties(object):
             self.drive_amp = drive_amp
             self.parameters = None
 
+        ## Drive frequency and background index shared by both
+        ## polarizabilities and the field calculations
+        self.w_drive = self.drive_energy_eV/hbar
+        self.n_b = np.sqrt(self.eps_b)
+
         self.alpha0_diag_dyad = cp.sparse_polarizability_tensor(
             ## This one is a little hacky, will need to fix for proper
             ## spectral reshaping later.
             mass=cp.fluorophore_mass(
                 ext_coef=self.fluo_ext_coef, # parameters['fluorophore']['extinction_coeff'],
                 gamma=self.fluo_mass_hbar_gamma/hbar, # parameters['fluorophore']['mass_gamma']/hbar
-                n_b=np.sqrt(self.eps_b)
+                n_b=self.n_b
                 ),
-            w_res=self.drive_energy_eV/hbar,
-            w=self.drive_energy_eV/hbar,
+            w_res=self.w_drive,
+            w=self.w_drive,
             gamma_nr=self.fluo_nr_hbar_gamma/hbar, # parameters['fluorophore']['test_gamma']/hbar,
             a=0,
             eps_inf=1,
@@ -237,7 +298,7 @@ class DipoleProperties(object):
             if self.sphere_model == 'MLWA':
                 self.alpha1_diag_dyad = (
                     cp.sparse_ret_sphere_polarizability_Drude(
-                        w=self.drive_energy_eV/hbar,
+                        w=self.w_drive,
                         eps_inf=self.eps_inf,
                         w_p= self.omega_plasma,
                         gamma=self.gamma_drude,
@@ -249,7 +310,7 @@ class DipoleProperties(object):
             elif self.sphere_model == 'TMatExp':
                 self.alpha1_diag_dyad = (
                     cp.sparse_TMatExp_sphere_polarizability_Drude(
-                        w=self.drive_energy_eV/hbar,
+                        w=self.w_drive,
                         eps_inf=self.eps_inf,
                         w_p= self.omega_plasma,
                         gamma=self.gamma_drude,
@@ -261,7 +322,7 @@ class DipoleProperties(object):
             elif self.sphere_model == 'Mie':
                 self.alpha1_diag_dyad = (
                     cp.sparse_Mie_sphere_polarizability_Drude(
-                        w=self.drive_energy_eV/hbar,
+                        w=self.w_drive,
                         eps_inf=self.eps_inf,
                         w_p= self.omega_plasma,
                         gamma=self.gamma_drude,
@@ -275,7 +336,7 @@ class DipoleProperties(object):
 
             self.alpha1_diag_dyad = (
                 cp.sparse_ret_prolate_spheroid_polarizability_Drude(
-                    self.drive_energy_eV/hbar,
+                    self.w_drive,
                     self.eps_inf,
                     self.omega_plasma,
                     self.gamma_drude,
@@ -319,29 +380,31 @@ class BeamSplitter(object):
 
 
     def powers_and_angels(self,E):
-        drive_I = np.abs(self.parameters['general']['drive_amp'])**2.
-
-        normed_Ix = np.abs(E[0])**2. / self.drive_I
-        normed_Iy = np.abs(E[1])**2. / self.drive_I
+        normed_Ix = (E[0].real**2 + E[0].imag**2) / self.drive_I
+        normed_Iy = (E[1].real**2 + E[1].imag**2) / self.drive_I
 
         Px_per_drive_I = np.sum(normed_Ix,axis=-1) / self.sensor_size**2.
         Py_per_drive_I = np.sum(normed_Iy,axis=-1) / self.sensor_size**2.
 
 
-        angles = np.arctan(Py_per_drive_I**0.5/Px_per_drive_I**0.5)
+        ## arctan2 keeps the x polarized limit (Px = 0) finite
+        angles = np.arctan2(np.sqrt(Py_per_drive_I), np.sqrt(Px_per_drive_I))
         return [angles, Px_per_drive_I, Py_per_drive_I]
 
     def powers_and_angels_no_interf(self,E1,E2):
-        drive_I = np.abs(self.parameters['general']['drive_amp'])**2.
-
-        normed_Ix = (np.abs(E1[0])**2. + np.abs(E2[0])**2.) / self.drive_I
-        normed_Iy = (np.abs(E1[1])**2. + np.abs(E2[1])**2.) / self.drive_I
+        normed_Ix = (
+            E1[0].real**2 + E1[0].imag**2 + E2[0].real**2 + E2[0].imag**2
+            ) / self.drive_I
+        normed_Iy = (
+            E1[1].real**2 + E1[1].imag**2 + E2[1].real**2 + E2[1].imag**2
+            ) / self.drive_I
 
         Px_per_drive_I = np.sum(normed_Ix,axis=-1) / self.sensor_size**2.
         Py_per_drive_I = np.sum(normed_Iy,axis=-1) / self.sensor_size**2.
 
 
-        angles = np.arctan(Py_per_drive_I**0.5/Px_per_drive_I**0.5)
+        ## arctan2 keeps the x polarized limit (Px = 0) finite
+        angles = np.arctan2(np.sqrt(Py_per_drive_I), np.sqrt(Px_per_drive_I))
         return [angles, Px_per_drive_I, Py_per_drive_I]
 
 
@@ -371,16 +434,8 @@ class FittingTools(object):
                 self.sensor_size = self.parameters['optics']['sensor_size']*cm_per_nm
 
                 ## Define coordinate domain from center of edge pixels
-                image_width_pixel_cc = ( ## Image width minus 1 pixel
-                    self.sensor_size - self.sensor_size/self.exp_resolution)
-
-                obs_points = diffi.observation_points(
-                    x_min=-image_width_pixel_cc/2,
-                    x_max=image_width_pixel_cc/2,
-                    y_min=-image_width_pixel_cc/2,
-                    y_max=image_width_pixel_cc/2,
-                    points=self.exp_resolution
-                    )
+                obs_points = _cached_observation_points(
+                    self.sensor_size, self.exp_resolution)
 
             elif param_file is None:
                 raise ValueError(
@@ -395,6 +450,16 @@ class FittingTools(object):
             ## store given
             self.obs_points = obs_points
 
+        ## Observation grid in nm, fixed for the life of the instance, so
+        ## fits don't rescale it on every residual evaluation.
+        self.obs_x_nm = self.obs_points[1]/cm_per_nm
+        self.obs_y_nm = self.obs_points[2]/cm_per_nm
+        self.obs_x_nm_flat = self.obs_x_nm.ravel()
+        self.obs_y_nm_flat = self.obs_y_nm.ravel()
+        ## and in cm for the field calculations
+        self.obs_x_flat = np.ascontiguousarray(self.obs_points[1]).ravel()
+        self.obs_y_flat = np.ascontiguousarray(self.obs_points[2]).ravel()
+
 
     def twoD_Gaussian(self,
         X, ## tuple of meshed (x,y) values
@@ -405,87 +470,186 @@ class FittingTools(object):
         sigma_y,
         theta,
         offset,
+        buffers=None,
         ):
+        """ Rotated 2D Gaussian on the grid 'X', raveled.
 
+            'buffers' is an optional pair of float arrays shaped like X[0]
+            to work in, so repeated calls during a fit don't allocate. The
+            returned array is then a view of buffers[0].
+            """
         xo = float(xo)
         yo = float(yo)
-        a = (
-            (np.cos(theta)**2)/(2*sigma_x**2)
-            +
-            (np.sin(theta)**2)/(2*sigma_y**2)
-            )
-        b = (
-            -(np.sin(2*theta))/(4*sigma_x**2)
-            +
-            (np.sin(2*theta))/(4*sigma_y**2)
-            )
-        c = (
-            (np.sin(theta)**2)/(2*sigma_x**2)
-            +
-            (np.cos(theta)**2)/(2*sigma_y**2)
-            )
-        g = (
-            offset
-            +
-            amplitude*np.exp( - (a*((X[0]-xo)**2) + 2*b*(X[0]-xo)*(X[1]-yo)
-            +
-            c*((X[1]-yo)**2)))
-            )
+        ## Scalar coefficients of the quadratic form, one cos/sin each
+        cos_t = np.cos(theta)
+        sin_t = np.sin(theta)
+        inv_2sx2 = 1/(2*sigma_x**2)
+        inv_2sy2 = 1/(2*sigma_y**2)
+        a = cos_t**2*inv_2sx2 + sin_t**2*inv_2sy2
+        b = sin_t*cos_t*(inv_2sy2 - inv_2sx2)
+        ## a c - b^2 = inv_2sx2 inv_2sy2 for any theta
+        c_minus_b_sqrd_on_a = inv_2sx2*inv_2sy2/a
+
+        if buffers is None:
+            buffers = (np.empty(np.shape(X[0])), np.empty(np.shape(X[1])))
+        g, dy = buffers
+
+        ## -(a dx^2 + 2b dx dy + c dy^2), completing the square in dx so
+        ## the whole exponent fits in the two buffers
+        np.subtract(X[1], yo, out=dy)
+        np.multiply(dy, b/a, out=g)
+        g += X[0]
+        g -= xo
+        g *= g
+        g *= a
+        dy *= dy
+        dy *= c_minus_b_sqrd_on_a
+        g += dy
+        g *= -1
+        np.exp(g, out=g)
+        g *= amplitude
+        g += offset
         return g.ravel()
 
+    def twoD_Gaussian_jacobian(self,
+        X, ## tuple of meshed (x,y) values
+        amplitude,
+        xo,
+        yo,
+        sigma_x,
+        sigma_y,
+        theta,
+        offset,
+        ):
+        """ Derivatives of the raveled 'twoD_Gaussian' with respect to
+            (amplitude, xo, yo, sigma_x, sigma_y, theta, offset), shape
+            (number of grid points, 7).
+            """
+        cos_t = np.cos(theta)
+        sin_t = np.sin(theta)
+        dx = np.ravel(X[0]) - float(xo)
+        dy = np.ravel(X[1]) - float(yo)
+        ## Coordinates along the Gaussian axes, in which the exponent is
+        ## u^2/(2 sigma_x^2) + v^2/(2 sigma_y^2)
+        u = cos_t*dx - sin_t*dy
+        v = sin_t*dx + cos_t*dy
+        u_on_sx2 = u/sigma_x**2
+        v_on_sy2 = v/sigma_y**2
+
+        exp_term = np.exp(-(u*u_on_sx2 + v*v_on_sy2)/2)
+        A_exp = amplitude*exp_term
+
+        jac = np.empty((dx.size, 7))
+        jac[:, 0] = exp_term
+        jac[:, 1] = A_exp*(cos_t*u_on_sx2 + sin_t*v_on_sy2)
+        jac[:, 2] = A_exp*(cos_t*v_on_sy2 - sin_t*u_on_sx2)
+        jac[:, 3] = A_exp*u*u_on_sx2/sigma_x
+        jac[:, 4] = A_exp*v*v_on_sy2/sigma_y
+        jac[:, 5] = A_exp*u*v*(1/sigma_x**2 - 1/sigma_y**2)
+        jac[:, 6] = 1
+        return jac
+
     def misloc_data_minus_model(
         self,
         fit_params,
-        *normed_raveled_image_data,
+        normed_raveled_image_data,
         ):
         ''' fit gaussian to data '''
         gaus = self.twoD_Gaussian(
-            (self.obs_points[1]/cm_per_nm, self.obs_points[2]/cm_per_nm),
+            (self.obs_x_nm, self.obs_y_nm),
             *fit_params ## ( A, xo, yo, sigma_x, sigma_y, theta, offset)
             )
 
         return gaus - normed_raveled_image_data
 
     def calculate_max_xy(self, images):
-        ## calculate index of maximum in each image.
-        apparent_centroids_idx = images.argmax(axis=-1)
+        ## calculate index of maximum in each image, flattening any 2D
+        ## images so the index runs over the whole grid.
+        flat_images = images.reshape(images.shape[0], -1)
+        apparent_centroids_idx = flat_images.argmax(axis=1)
         ## define locations for each maximum in physical coordinate system
 
-        x_cen = (self.obs_points[1]/cm_per_nm).ravel()[apparent_centroids_idx]
-        y_cen = (self.obs_points[2]/cm_per_nm).ravel()[apparent_centroids_idx]
+        x_cen = np.take(self.obs_x_nm_flat, apparent_centroids_idx)
+        y_cen = np.take(self.obs_y_nm_flat, apparent_centroids_idx)
+
+        return [x_cen,y_cen]
+
+    def calculate_intensity_centroids(self, images):
+        """ Intensity weighted mean position of every raveled image at
+            once, with each image's minimum taken as background. Flat
+            images have no centroid and give NaN.
+            """
+        weights = images - images.min(axis=-1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = weights / weights.sum(axis=-1, keepdims=True)
+
+        x_cen = weights @ self.obs_x_nm_flat
+        y_cen = weights @ self.obs_y_nm_flat
 
         return [x_cen,y_cen]
 
     def calculate_apparent_centroids(self, images):
-        """ calculate index of maximum in each image. """
+        """ Fit a 2D Gaussian to each image and return the centers. """
         num_of_images = images.shape[0]
 
         apparent_centroids_xy = np.zeros((num_of_images,2))
 
-        max_positions = self.calculate_max_xy(images)
+        raveled_images = images.reshape(num_of_images, -1)
+
+        ## Seed all fits at once from the centers of intensity, which sit
+        ## closer to the Gaussian center than the brightest pixel. Flat
+        ## images have none, so those start from the brightest pixel.
+        x0s, y0s = self.calculate_intensity_centroids(raveled_images)
+        no_centroid = np.isnan(x0s)
+        if np.any(no_centroid):
+            x_maxs, y_maxs = self.calculate_max_xy(raveled_images)
+            x0s = np.where(no_centroid, x_maxs, x0s)
+            y0s = np.where(no_centroid, y_maxs, y0s)
+
+        ## Normalize every image to its peak at once
+        normed_images = (
+            raveled_images / raveled_images.max(axis=-1, keepdims=True))
+
+        ## Scratch grids reused by every residual evaluation of every fit
+        buffers = (np.empty(self.obs_x_nm.shape), np.empty(self.obs_y_nm.shape))
+        def data_minus_model(fit_params, normed_raveled_image_data):
+            gaus = self.twoD_Gaussian(
+                (self.obs_x_nm, self.obs_y_nm),
+                *fit_params, ## ( A, xo, yo, sigma_x, sigma_y, theta, offset)
+                buffers=buffers
+                )
+            return gaus - normed_raveled_image_data
 
-        for i in np.arange(num_of_images):
-            x0 = max_positions[0][i]
-            y0 = max_positions[1][i]
+        def data_minus_model_jac(fit_params, normed_raveled_image_data):
+            return self.twoD_Gaussian_jacobian(
+                (self.obs_x_nm, self.obs_y_nm),
+                *fit_params
+                )
 
-            params0 = [1, x0, y0, 100, 100, 0, 0]
+        ## Each image keeps its own solve; one least_squares over the stacked
+        ## residuals would tie the fits to a single trust region and a dense
+        ## (N*pixels, 7*N) Jacobian.
+        for i in np.arange(num_of_images):
+            params0 = [1, x0s[i], y0s[i], 100, 100, 0, 0]
 
-            args=tuple(images[i]/np.max(images[i]))
+            args=(normed_images[i],)
+            ## Analytic Jacobian in place of 7 extra residual evaluations
+            ## per step for finite differences
             fit_gaussian = opt.least_squares(
-                self.misloc_data_minus_model, params0, args=args)
-            resulting_fit_params = fit_gaussian['x']
-            fit_result = self.twoD_Gaussian(
-                (self.obs_points[1]/cm_per_nm, self.obs_points[2]/cm_per_nm), ## tuple of meshed (x,y) values
-                *resulting_fit_params
-                )
-            centroid_xy = resulting_fit_params[1:3]
-            apparent_centroids_xy[i] = centroid_xy
-        ## define locations for each maximum in physical coordinate system
+                data_minus_model,
+                params0,
+                jac=data_minus_model_jac,
+                method='lm',
+                x_scale='jac',
+                args=args)
+            ## Centroid is (xo, yo) of the fit parameters
+            apparent_centroids_xy[i] = fit_gaussian['x'][1:3]
 
         return apparent_centroids_xy.T  ## returns [x_cen(s), y_cen(s)]
 
     def image_from_E(self, E):
-        normed_I = np.sum(np.abs(E)**2., axis=0) / self.drive_I
+        normed_I = np.sum(E.real**2 + E.imag**2, axis=0)
+        normed_I /= self.drive_I
 
         return normed_I
 
@@ -523,16 +687,17 @@ class FittingTools(object):
         compression_pairs = [(d, c//d) for d,c in zip(new_shape,
                                                       ndarray.shape)]
         flattened = [l for p in compression_pairs for l in p]
-        ndarray = ndarray.reshape(flattened)
-        for i in range(len(new_shape)):
-            op = getattr(ndarray, operation)
-            ndarray = op(-1*(i+1))
-        return ndarray
+        ## Reduce every within-bin axis in one pass
+        binned_axes = tuple(2*i + 1 for i in range(len(new_shape)))
+        op = getattr(ndarray.reshape(flattened), operation)
+        return op(axis=binned_axes)
 
 
     def rebin(self, a, shape):
-        sh = shape[0], a.shape[0]//shape[0], shape[1], a.shape[1]//shape[1]
-        return a.reshape(sh).mean(-1).mean(1)
+        """ Average the last two axes of 'a' down to 'shape'. """
+        sh = a.shape[:-2] + (
+            shape[0], a.shape[-2]//shape[0], shape[1], a.shape[-1]//shape[1])
+        return a.reshape(sh).mean(axis=(-3, -1))
 
 
 class PlottableDipoles(DipoleProperties):
@@ -617,16 +782,8 @@ class PlottableDipoles(DipoleProperties):
             ## Define coordinate domain from center of edge pixels. Must be
             ## multiple of exp resolution for pixel averaging to work
             self.plot_resolution = 10 * self.exp_resolution
-            image_width_pixel_cc = ( ## Image width minus 1 pixel
-                self.sensor_size - self.sensor_size/self.plot_resolution)
-
-            self.plt_obs_points = diffi.observation_points(
-                x_min=-image_width_pixel_cc/2,
-                x_max=image_width_pixel_cc/2,
-                y_min=-image_width_pixel_cc/2,
-                y_max=image_width_pixel_cc/2,
-                points=self.plot_resolution
-                )
+            self.plt_obs_points = _cached_observation_points(
+                self.sensor_size, self.plot_resolution)
 
         elif self.parameters is None:
             if obs_points is not None:
@@ -658,17 +815,19 @@ class PlottableDipoles(DipoleProperties):
         x_plot = x
         y_plot = y
 
+        ## Every molecule to centroid line as one artist, segments of shape
+        ## (N, 2, 2)
+        segments = np.stack([
+            np.column_stack([x_mol_loc, y_mol_loc]),
+            np.column_stack([x_plot, y_plot]),
+            ], axis=1)
+        def connecting_lines():
+            return LineCollection(
+                segments, colors='k', linewidths=.3, zorder=3)
+
         if ax is None:
             plt.figure(dpi=300)
-            for i in np.arange(x_plot.shape[0]):
-                self.connectpoints(
-                    cen_x=x_plot,
-                    cen_y=y_plot,
-                    mol_x=x_mol_loc,
-                    mol_y=y_mol_loc,
-                    p=i,
-                    zorder=3,
-                    )
+            plt.gca().add_collection(connecting_lines())
 
             localization_handle = plt.scatter(
                 x_plot,
@@ -680,16 +839,7 @@ class PlottableDipoles(DipoleProperties):
             # plt.tight_layout()
 
         else:
-            for i in np.arange(x_plot.shape[0]):
-                self.connectpoints(
-                    cen_x=x_plot,
-                    cen_y=y_plot,
-                    mol_x=x_mol_loc,
-                    mol_y=y_mol_loc,
-                    p=i,
-                    ax=ax,
-                    zorder=3,
-                    )
+            ax.add_collection(connecting_lines())
             localization_handle = ax.scatter(
                 x_plot,
                 y_plot,
@@ -735,8 +885,9 @@ class PlottableDipoles(DipoleProperties):
             if (np.asarray(true_mol_angle).ndim <= 1):
 
                 ## mark true orientation
+                true_dirs = np.exp(1j*np.asarray(true_mol_angle))
                 quiv_tr = ax0.quiver(
-                    x_plot, y_plot, np.cos(true_mol_angle),np.sin(true_mol_angle),
+                    x_plot, y_plot, true_dirs.real, true_dirs.imag,
                     color='black',
                     width=0.005,
                     scale=15,
@@ -764,9 +915,16 @@ class PlottableDipoles(DipoleProperties):
 
             # For main quiver, plot relative mispolarization if true angle is given
             if true_mol_angle is not None:
-                diff_angles = np.abs(angles - true_mol_angle)
+                ## Orientations are only defined modulo pi, so wrap the
+                ## difference into [-pi/2, pi/2) before taking its size.
+                diff_angles = np.subtract(angles, true_mol_angle, dtype=float)
+                diff_angles += np.pi/2
+                np.mod(diff_angles, np.pi, out=diff_angles)
+                diff_angles -= np.pi/2
             else:
-                diff_angles = np.abs(angles)
+                diff_angles = np.array(angles, dtype=float)
+            ## Take the magnitude in the same array
+            np.abs(diff_angles, out=diff_angles)
 
             arrow_colors = diff_angles
             # clim = [0, np.pi/2]
@@ -783,11 +941,12 @@ class PlottableDipoles(DipoleProperties):
 
         # print(f'arrow_colors = {arrow_colors}')
         ## Mark apparent orientation
+        apparent_dirs = np.exp(1j*np.asarray(angles))
         quiv_ap = ax0.quiver(
             x_plot,
             y_plot,
-            np.cos(angles),
-            np.sin(angles),
+            apparent_dirs.real,
+            apparent_dirs.imag,
             arrow_colors,
             cmap=cmap,
             clim=clim,
@@ -1031,12 +1190,18 @@ class PlottableDipoles(DipoleProperties):
 
 
     def calculate_mislocalization_magnitude(self, x_cen, y_cen, x_mol, y_mol):
-        misloc = ( (x_cen-x_mol)**2. + (y_cen-y_mol)**2. )**(0.5)
+        misloc = np.hypot(x_cen-x_mol, y_cen-y_mol)
         return misloc
 
 
 class CoupledDipoles(PlottableDipoles, FittingTools):
 
+    # Real dtype of the observation grid arithmetic in foc_dif_dip_fields.
+    # Setting np.float32 on an instance (or subclass) halves the memory
+    # traffic of large field calculations, with fields returned as
+    # complex64, at the cost of single precision images.
+    field_dtype = np.float64
+
     def __init__(self, **kwargs):
         """ Container for methods which perform coupled dipole dynamics
             calculations contained in 'coupled_dipoles' module as well
@@ -1060,6 +1225,11 @@ class CoupledDipoles(PlottableDipoles, FittingTools):
         ## Get plotting methods
         PlottableDipoles.__init__(self, **kwargs)
 
+        ## Wavenumber of the drive in the background medium, shared by every
+        ## field evaluation. Kept as a Python float so it multiplies arrays
+        ## as a plain scalar and does not promote single precision grids.
+        self.k_b = float(self.w_drive*self.n_b/c)
+
     def foc_dif_dip_fields(self, dipole_mag_array, dipole_coordinate_array):
         ''' Evaluates analytic form of focused+diffracted dipole fields
             anlong observation grid given
@@ -1076,55 +1246,46 @@ class CoupledDipoles(PlottableDipoles, FittingTools):
                 Fields with shape ~ (3, ?...)
             '''
 
-        p = dipole_mag_array
-        bfx = dipole_coordinate_array
+        dtype = self.field_dtype
+        complex_dtype = np.result_type(dtype, np.complex64)
+        p = dipole_mag_array.astype(complex_dtype, copy=False)
+        bfx = dipole_coordinate_array.astype(dtype, copy=False)
 
-        v_rel_obs_x_pts = (self.obs_points[1].ravel()[:,None] - bfx.T[0]).T
-        v_rel_obs_y_pts = (self.obs_points[2].ravel()[:,None] - bfx.T[1]).T
+        ## Displacements from each dipole to each observation point, shape
+        ## (n dipoles, n points)
+        v_rel_obs_x_pts = (
+            self.obs_x_flat.astype(dtype, copy=False) - bfx[:, 0, None])
+        v_rel_obs_y_pts = (
+            self.obs_y_flat.astype(dtype, copy=False) - bfx[:, 1, None])
 
         px_fields = afi.E_field(
             0,
             v_rel_obs_x_pts,
             v_rel_obs_y_pts,
-            (self.drive_energy_eV/hbar)*np.sqrt(self.eps_b)/c
+            self.k_b
             )
         py_fields = afi.E_field(
             np.pi/2,
             v_rel_obs_x_pts,
             v_rel_obs_y_pts,
-            (self.drive_energy_eV/hbar)*np.sqrt(self.eps_b)/c
+            self.k_b
             )
         pz_fields = afi.E_pz(
             xi=v_rel_obs_x_pts,
             y=v_rel_obs_y_pts,
-            k=(self.drive_energy_eV/hbar)*np.sqrt(self.eps_b)/c
+            k=self.k_b
             )
 
-        ## returns [Ex, Ey, Ez] for dipoles oriented along cart units
-
-        Ex = (
-            p[:,0,None]*px_fields[0]
-            +
-            p[:,1,None]*py_fields[0]
-            +
-            p[:,2,None]*pz_fields[0]
-            )
-        Ey = (
-            p[:,0,None]*px_fields[1]
-            +
-            p[:,1,None]*py_fields[1]
-            +
-            p[:,2,None]*pz_fields[1]
-            )
-        Ez = (
-            p[:,0,None]*px_fields[2]
-            +
-            p[:,1,None]*py_fields[2]
-            +
-            p[:,2,None]*pz_fields[2]
-            )
+        ## returns [Ex, Ey, Ez] for dipoles oriented along cart units, so
+        ## stacked by source orientation the fields have shape
+        ## (3 sources, 3 components, n dipoles, n points)
+        unit_dipole_fields = np.stack(
+            [px_fields, py_fields, pz_fields]
+            ).astype(complex_dtype, copy=False)
 
-        return np.array([Ex,Ey,Ez])
+        ## Weight by dipole components and sum over sources in one
+        ## contraction, giving [Ex, Ey, Ez]
+        return np.einsum('ds,scdo->cdo', p, unit_dipole_fields)
 
 
     def dipole_fields(
@@ -1157,18 +1318,9 @@ class CoupledDipoles(PlottableDipoles, FittingTools):
             drive_hbar_w=self.drive_energy_eV,
             alpha0_diag=self.alpha0_diag_dyad,
             alpha1_diag=self.alpha1_diag_dyad,
-            n_b=np.sqrt(self.eps_b),
+            n_b=self.n_b,
             drive_amp=self.drive_amp,
             )
-        mol_E = self.foc_dif_dip_fields(
-            dipole_mag_array=p0,
-            dipole_coordinate_array=d+plas_loc,
-            )
-        plas_E = self.foc_dif_dip_fields(
-            dipole_mag_array=p1,
-            dipole_coordinate_array=plas_loc,
-            )
-
         p0_unc, = cp.uncoupled_p0(
             mol_angle,
             E_d_angle=None,
@@ -1176,21 +1328,30 @@ class CoupledDipoles(PlottableDipoles, FittingTools):
             drive_amp=self.drive_amp,
             )
 
-        # if type(mol_angle)==np.ndarray and mol_angle.shape[0]>1:
-        p0_unc_E = self.foc_dif_dip_fields(
-            dipole_mag_array=np.atleast_2d(p0_unc),
-            dipole_coordinate_array=d
+        ## Stack the coupled molecule, plasmon and uncoupled molecule dipoles
+        ## so the fields are evaluated in a single pass over the observation
+        ## grid. Each group is broadcast to a row per dipole.
+        n0 = p0.shape[0]
+        n1 = p1.shape[0]
+        n2 = d.shape[0]
+        p_all = np.concatenate([
+            p0,
+            p1,
+            np.broadcast_to(p0_unc.reshape(-1, 3), (n2, 3)),
+            ])
+        coord_all = np.concatenate([
+            np.broadcast_to(d+plas_loc, (n0, 3)),
+            np.broadcast_to(plas_loc, (n1, 3)),
+            d,
+            ])
+        E_all = self.foc_dif_dip_fields(
+            dipole_mag_array=p_all,
+            dipole_coordinate_array=coord_all,
             )
-        # elif (
-        #     type(mol_angle) == int or
-        #     type(mol_angle) == float or
-        #     type(mol_angle) == np.float64 or
-        #     (type(mol_angle) == np.ndarray and mol_angle.shape[0]==1)
-        #     ):
-        #     p0_unc_E = self.foc_dif_dip_fields(
-        #         dipole_mag_array=p0_unc[None,:],
-        #         dipole_coordinate_array=d,
-        #         )
+        mol_E = E_all[:, :n0]
+        plas_E = E_all[:, n0:n0+n1]
+        p0_unc_E = E_all[:, n0+n1:]
+
         return [mol_E, plas_E, p0_unc_E, p0, p1]
 
 
@@ -1200,16 +1361,29 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         '''
     ## set up inverse mapping from observed -> true angle for signle molecule
     ## in the plane.
-    saved_mapping = np.loadtxt(txt_file_path+'/obs_pol_vs_true_angle.txt')
+    saved_mapping = load_angle_mapping()
     true_ord_angles, obs_ord_angles = saved_mapping.T
-    #from scipy import interpolate
-    f = interpolate.interp1d(true_ord_angles, obs_ord_angles)
-    f_inv = interpolate.interp1d(
-        obs_ord_angles[:251],
-        true_ord_angles[:251],
-        bounds_error=False,
-        fill_value=(0,np.pi/2)
-        )
+    ## Both tables are linear interpolations in monotonic abscissas, so
+    ## np.interp does the lookup without interp1d's per call overhead.
+    @staticmethod
+    def f(true_angles):
+        return np.interp(
+            true_angles,
+            MolCoupNanoRodExp.true_ord_angles,
+            MolCoupNanoRodExp.obs_ord_angles,
+            )
+
+    ## Observed angle is monotonic in the true angle over the first 251
+    ## points, [0, pi/2].
+    @staticmethod
+    def f_inv(obs_angles):
+        return np.interp(
+            obs_angles,
+            MolCoupNanoRodExp.obs_ord_angles[:251],
+            MolCoupNanoRodExp.true_ord_angles[:251],
+            left=0,
+            right=np.pi/2,
+            )
 
     def __init__(
         self,
@@ -1264,10 +1438,12 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         self.pt_is_in_ellip = self.mol_not_quenched()
         ## select molecules outside region,
         if for_fit==False:
-            self.mol_locations = locations[self.pt_is_in_ellip]
+            self.mol_locations = np.compress(
+                self.pt_is_in_ellip, locations, axis=0)
             ## select molecule angles if listed per molecule,
-            if type(mol_angle)==np.ndarray and mol_angle.shape[0]>1:
-                self.mol_angles = mol_angle[self.pt_is_in_ellip]
+            if isinstance(mol_angle, np.ndarray) and mol_angle.shape[0]>1:
+                self.mol_angles = np.compress(
+                    self.pt_is_in_ellip, mol_angle, axis=0)
             else: self.mol_angles = mol_angle
         elif for_fit==True:
             self.mol_locations = locations
@@ -1276,31 +1452,12 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         if auto_calc_fiels:
             self.calculate_fields()
 
-        # Calculate plot domain from molecule locations
-        self.default_plot_limits = [
-            (
-                np.min(self.mol_locations)
-                -
-                (
-                    (
-                        np.max(self.mol_locations)
-                        -
-                        np.min(self.mol_locations)
-                        )*.1
-                    )
-                ),
-            (
-                np.max(self.mol_locations)
-                +
-                (
-                    (
-                        np.max(self.mol_locations)
-                        -
-                        np.min(self.mol_locations)
-                        )*.1
-                    )
-                ),
-            ]
+        # Calculate plot domain from molecule locations, padded by 10% of
+        # their extent on either side
+        loc_min = np.min(self.mol_locations)
+        loc_max = np.max(self.mol_locations)
+        loc_pad = (loc_max - loc_min)*.1
+        self.default_plot_limits = [loc_min - loc_pad, loc_max + loc_pad]
 
     def calculate_fields(self):
         # Automatically calculate fields with coupled dipoles upon
@@ -1321,6 +1478,17 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         # Calcualte images
         self.anal_images = self.image_from_E(self.mol_E + self.plas_E)
 
+    def recompute_images(self, locations, mol_angle):
+        """ Recalculate fields and images for new molecule locations and
+            angles, reusing the dipole properties and observation grid set
+            up by __init__. As with 'for_fit', molecules are not filtered
+            by the quenching zone.
+            """
+        self.mol_locations = locations
+        self.mol_angles = mol_angle
+        self.calculate_fields()
+        return self.anal_images
+
     def work_on_rod_by_mol(self,
         locations=None,
         mol_angle=None,
@@ -1337,19 +1505,30 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         if plas_angle is None:
             plas_angle = self.rod_angle
 
-        d = locations*cm_per_nm
-
-        Gd = cp.G(self.drive_energy_eV, d, np.sqrt(self.eps_b))
-
-        Gd_dot_p0 = np.einsum('...ij,...j->...i', Gd, self.p0)
+        ## The Green's function only depends on the locations and the
+        ## background, so keep the last one for repeated calls at the same
+        ## locations (e.g. sweeps over molecule orientation). A copy of the
+        ## locations is held and compared by value, so arrays edited in
+        ## place are not mistaken for the cached ones.
+        Gd_key = (self.drive_energy_eV, self.eps_b)
+        cached = getattr(self, '_Gd_cache', None)
+        if (
+            cached is not None
+            and cached[0] == Gd_key
+            and np.array_equal(cached[1], locations)
+            ):
+            Gd = cached[2]
+        else:
+            d = locations*cm_per_nm
+            Gd = cp.G(self.drive_energy_eV, d, self.n_b)
+            self._Gd_cache = (Gd_key, np.array(locations, copy=True), Gd)
 
-        p1stardot_dot_E0 = np.einsum(
-            'ij,ij->i',
-            -1j*self.drive_energy_eV/hbar * self.p1,
-            Gd_dot_p0
-            )
+        ## p1 . G p0 in one contraction, then scaled per molecule. Since
+        ## Re(-i w z) = w Im(z), the time derivative of p1 only contributes
+        ## a real prefactor.
+        p1_dot_E0 = np.einsum('ij,ijk,ik->i', self.p1, Gd, self.p0)
 
-        work_done = 1/2 * np.real(p1stardot_dot_E0)
+        work_done = 1/2 * self.w_drive * np.imag(p1_dot_E0)
         return work_done
 
 
@@ -1364,10 +1543,20 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         # Calculate fields and angles and assign as instance attribute
         if hasattr(self, 'mol_E') and hasattr(self, 'plas_E'):
             if self.exclude_interference == False:
+                ## Sum the fields into a buffer kept between calls, remade
+                ## only if the fields have been recalculated with a new
+                ## shape or type.
+                E_total = getattr(self, '_E_total_buf', None)
+                if (
+                    E_total is None
+                    or E_total.shape != self.mol_E.shape
+                    or E_total.dtype != self.mol_E.dtype
+                    ):
+                    E_total = self._E_total_buf = np.empty_like(self.mol_E)
+                np.add(self.mol_E, self.plas_E, out=E_total)
+
                 self.angles, self.Px_per_drive_I, self.Py_per_drive_I = (
-                    self.powers_and_angels(
-                        self.mol_E + self.plas_E
-                        )
+                    self.powers_and_angels(E_total)
                     )
             # For exclusion of interference, fields must be input
             # seperately into funtion 'powers_and_angels_no_interf'.
@@ -1403,9 +1592,6 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
             quenching zone, defined as 10 nm from surface of fit spheroid
             '''
 
-        if rod_angle is None:
-            rod_angle=self.rod_angle
-
         if input_x_mol is None:
             input_x_mol=self.input_x_mol
 
@@ -1418,21 +1604,23 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         if short_quench_radius is None:
             short_quench_radius=self.quench_radius_c_nm
 
-        rotated_x = (
-            np.cos(rod_angle)*input_x_mol
-            + np.sin(rod_angle)*input_y_mol
-            )
-        rotated_y = (
-            -np.sin(rod_angle)*input_x_mol
-            + np.cos(rod_angle)*input_y_mol
-            )
+        if rod_angle is None:
+            rod_angle = self.rod_angle
 
-        rotated_ellip_eq = (
-            rotated_x**2./long_quench_radius**2
-            + rotated_y**2./short_quench_radius**2
+        M_xx, M_xy, M_yy = quench_ellipse_form(
+            np.cos(rod_angle),
+            np.sin(rod_angle),
+            long_quench_radius,
+            short_quench_radius,
             )
 
-        return (rotated_ellip_eq > 1)
+        ## x (M_xx x + 2 M_xy y) + M_yy y^2, accumulated in place.
+        ellip_eq = M_xx*input_x_mol
+        ellip_eq += (2*M_xy)*input_y_mol
+        ellip_eq *= input_x_mol
+        ellip_eq += M_yy*input_y_mol**2
+
+        return (ellip_eq > 1)
 
 
     def plot_mispol_map(self,
@@ -1557,6 +1745,27 @@ class MolCoupNanoRodExp(CoupledDipoles, BeamSplitter):
         # save nanorod angle
 
 
+## Instance fitting in each worker process of
+## 'FitModelToData.fit_model_to_image_data', handed over once by the pool
+## initializer rather than pickled with every task.
+_fit_worker_instance = None
+
+def _init_fit_worker(fit_instance):
+    global _fit_worker_instance
+    _fit_worker_instance = fit_instance
+
+def _fit_image_in_worker(task):
+    """ Fit one image in a pool worker. The random initial orientations are
+        seeded per task so workers don't repeat the parent's random state.
+        """
+    seed, image_fit_args = task
+    np.random.seed(seed)
+    return (
+        image_fit_args['i'],
+        _fit_worker_instance._fit_model_to_image(**image_fit_args),
+        )
+
+
 class FitModelToData(CoupledDipoles, BeamSplitter):
     ''' Class to contain fitting functions that act on class 'MolCoupNanoRodExp'
     as well as variables that are needed by 'MolCoupNanoRodExp'
@@ -1591,6 +1800,9 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
         CoupledDipoles.__init__(self, **kwargs)
         BeamSplitter.__init__(self, **kwargs)
 
+        ## Sensor area in nm^2, normalizing image integrals during fits
+        self._integral_norm_area = (self.sensor_size/cm_per_nm)**2.
+
         ## Define quenching readii for smart initial guess,
         ## attributes inherited from DipoleProperties.
         if hasattr(self, 'quench_over_real_disk'):
@@ -1614,12 +1826,39 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
         integral_normalize=False,
         avg_model_over_pixels=False,
         least_squares_kwargs={},
+        processes=1,
+        warm_start_radius=None,
         ):
         """ Returnes array of model fit parameters, unless
                 'return_full_fit_output' == True
             then the result is that array followed by a list
             of the dictionaries returned by 'opt.least_squares'.
+
+            The images are fit independently, so with 'processes' other
+            than 1 they are distributed over a multiprocessing.Pool of
+            that many workers ('processes=None' uses every core). Each
+            worker seeds its random initial orientations from the
+            parent's random state.
+
+            When fitting sequentially, 'warm_start_radius' (nm) starts
+            each fit from the converged fit of the nearest earlier image
+            whose initial guess lies within that distance, shifted by the
+            difference in initial guesses. Neighboring molecules have
+            similar fits, so this usually takes few iterations. The usual
+            initial guess is kept as a fallback if the warm start fails
+            to converge. Warm starts need the earlier fits, so they can't
+            be combined with 'processes' other than 1.
+
+            'least_squares_kwargs' are passed on to 'opt.least_squares',
+            overriding the defaults of method='lm' with ftol, xtol and gtol
+            of 1e-6 ('trf' is used instead if 'bounds' are given).
             """
+        if warm_start_radius is not None and processes != 1:
+            raise ValueError(
+                "'warm_start_radius' requires sequential fits, "
+                +
+                f"but processes = {processes}."
+                )
 
         ## calculate index of maximum in each image,
         ## going to use this for the initial position guess
@@ -1650,263 +1889,394 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
         elif ini_guess is None:
             max_positions = self.calculate_max_xy(images)
 
-        ## Loop through images and fit.
-        for i in np.arange(num_of_images):
-            print(f"\n")
-            print(f"~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-            print(f"Fitting model to molecule {i}")
-            print(f"~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-            ## Establish initial guesses for molecules
-
-            # If no initial guesses specified as kwarg, use pixel
-            # location of maximum intensity.
-            ## Assume ini_guesses given as numy array.
-            if type(ini_guess) is np.ndarray:
-                ini_x = ini_guess[i, 0]
-                ini_y = ini_guess[i, 1]
-
-            # If kwarg 'Gauss' specified, use centroid of gaussian
-            # localization as inilial guess
-            elif (ini_guess == 'Gauss') or (ini_guess == 'gauss'):
-                ## Define relative to plasmon location
-                ini_x, ini_y = [
-                    self.x_gau_cen_abs[i] - self.plas_centroids[i, 0],
-                    self.y_gau_cen_abs[i] - self.plas_centroids[i, 1]
-                    ]
+        ## Establish initial guesses for all molecules at once
+        # If no initial guesses specified as kwarg, use pixel
+        # location of maximum intensity.
+        ## Assume ini_guesses given as numy array.
+        if type(ini_guess) is np.ndarray:
+            ini_xs = ini_guess[:, 0]
+            ini_ys = ini_guess[:, 1]
+
+        # If kwarg 'Gauss' specified, use centroid of gaussian
+        # localization as inilial guess
+        elif (ini_guess == 'Gauss') or (ini_guess == 'gauss'):
+            ## Define relative to plasmon location
+            ini_xs = self.x_gau_cen_abs - self.plas_centroids[:, 0]
+            ini_ys = self.y_gau_cen_abs - self.plas_centroids[:, 1]
+
+        elif ini_guess == 'on_edge':
+            ini_xs, ini_ys = self._better_init_loc(
+                self.x_gau_cen_abs - self.plas_centroids[:, 0],
+                self.y_gau_cen_abs - self.plas_centroids[:, 1]
+                )
 
-            elif ini_guess == 'on_edge':
-                ini_x, ini_y = self._better_init_loc(
-                    self.x_gau_cen_abs[i] - self.plas_centroids[i, 0],
-                    self.y_gau_cen_abs[i] - self.plas_centroids[i, 1]
-                    )
+        elif ini_guess is None:
+            ini_xs = np.round(max_positions[0])
+            ini_ys = np.round(max_positions[1])
+
+        ## Test all initial guesses against the quenching zone together
+        if check_ini == True:
+            ini_guesses_not_quench = MolCoupNanoRodExp.mol_not_quenched(
+                self,
+                self.rod_angle,
+                ini_xs,
+                ini_ys,
+                self.quench_radius_a_nm,
+                self.quench_radius_c_nm,
+                )
 
-            elif ini_guess is None:
-                ini_x = np.round(max_positions[0][i])
-                ini_y = np.round(max_positions[1][i])
+        ## Normalize all images for fitting.
+        image_norms = images.reshape(num_of_images, -1)
+        if integral_normalize:
+            image_norms = image_norms.sum(axis=-1)/self._integral_norm_area
 
-            print(
-                'initial guess position: ({},{})'.format(
-                    ini_x, ini_y
-                    )
+        elif not integral_normalize:
+            image_norms = image_norms.max(axis=-1)
+
+        ## The normalized data are only read by the residual subtraction,
+        ## so single precision is plenty and halves the data traffic. Model
+        ## images stay double, the finite difference Jacobian needs it.
+        raveled_normed_images = (
+            images / image_norms.reshape(
+                (num_of_images,) + (1,)*(images.ndim - 1))
+            ).astype(np.float32)
+
+        ## Arguments of the fit to the i'th image
+        def image_fit_args(i):
+            return dict(
+                i=i,
+                ini_x=ini_xs[i],
+                ini_y=ini_ys[i],
+                a_raveled_normed_image=raveled_normed_images[i],
+                plas_centroid=self.plas_centroids[i],
+                check_ini=check_ini,
+                ini_guess_not_quench=(
+                    ini_guesses_not_quench[i] if check_ini == True else None),
+                check_fit_loc=check_fit_loc,
+                max_fail_converge=max_fail_converge,
+                let_mol_ori_out_of_plane=let_mol_ori_out_of_plane,
+                integral_normalize=integral_normalize,
+                avg_model_over_pixels=avg_model_over_pixels,
+                least_squares_kwargs=least_squares_kwargs,
                 )
 
-            ## Randomize initial molecule oriantation, maybe do something
-            ## smarter later.
-            if not let_mol_ori_out_of_plane:
-                ini_mol_orientation = np.pi * np.random.random(1)
-                params0 = [ini_x, ini_y, ini_mol_orientation]
-            elif let_mol_ori_out_of_plane:
-                ini_mol_orientation = (
-                    np.array([[np.pi/2, np.pi]]) * np.random.random((1, 2)))
-                # And assign parameters for fit.
-                params0 = [ini_x, ini_y, *ini_mol_orientation.ravel()]
-            print(f"initial guess angle = {params0[2:]}")
-
-            # Should test inital guess here, since I am only changing the
-            # inital guess. Later loop on fitting could still be healpful later.
-            if check_ini == True:
-                print('Checking inital guess')
-                ini_guess_not_quench = MolCoupNanoRodExp.mol_not_quenched(
-                    self,
-                    self.rod_angle,
-                    ini_x,
-                    ini_y,
-                    self.quench_radius_a_nm,
-                    self.quench_radius_c_nm,
-                    )
-                print(
-                    # 'self.rod_angle, ', self.rod_angle, '\n',
-                    # 'ini_x, ', ini_x, '\n',
-                    # 'ini_y, ', ini_y, '\n',
-                    '    self.quench_radius_a_nm, ', self.quench_radius_a_nm,
-                    '    self.quench_radius_c_nm, ', self.quench_radius_c_nm,
-                    )
-                print('    In quenching zone? {}'.format(not ini_guess_not_quench))
-                if ini_guess_not_quench:
-                    # continure to fit
-                    pass
-
-                elif not ini_guess_not_quench:
-                    # Adjust ini_guess to be outsie quenching zone
-                    print(f'Initial guess in quench. Zone, OG params: {params0}')
-                    on_edge_x, on_edge_y = self._better_init_loc(ini_x, ini_y)
-                    ini_x += on_edge_x
-                    ini_y += on_edge_y
-                    params0[:2] = ini_x, ini_y
-                    print(f'Params shifted to: {params0}')
-
-            ## Normalize images for fitting.
-            if integral_normalize:
-                a_raveled_normed_image = images[i]/(
-                    images[i].sum()
-                    /
-                    (self.sensor_size/cm_per_nm)**2. ## A in nm
-                    )
+        ## Loop through images and fit, in this process or spread over a
+        ## pool of workers that each hold a copy of this instance.
+        if processes == 1:
+            pool = None
+            image_fits = self._warm_started_image_fits(
+                image_fit_args,
+                num_of_images,
+                warm_start_radius,
+                )
+        else:
+            if processes is None:
+                processes = os.cpu_count()
+            seeds = np.random.randint(2**31 - 1, size=num_of_images)
+            fit_tasks = [
+                (seeds[i], image_fit_args(i)) for i in range(num_of_images)
+                ]
+            pool = multiprocessing.Pool(
+                processes,
+                initializer=_init_fit_worker,
+                initargs=(self,),
+                )
+            image_fits = pool.imap_unordered(
+                _fit_image_in_worker,
+                fit_tasks,
+                chunksize=max(1, num_of_images//(4*processes)),
+                )
 
-            elif not integral_normalize:
-                a_raveled_normed_image = images[i]/np.max(images[i])
+        try:
+            for i, optimized_fit in image_fits:
+                # We satisfied apparently.
+                # Store fit result parameters as class instance attribute.
+                if optimized_fit['success']:
+                    self.model_fit_results[i][:2] = optimized_fit['x'][:2]
+                    # Project fit result angles to first quadrant
+                    if not let_mol_ori_out_of_plane:
+                        angle_in_first_quad = self.map_angles_to_first_quad(
+                            optimized_fit['x'][2]
+                            )
+                    elif let_mol_ori_out_of_plane:
+                        angle_in_first_quad = optimized_fit['x'][2:]
 
+                    self.model_fit_results[i][2:] = angle_in_first_quad
 
-            ## Place image data and plasmon location in tp tuple as required
-            ## by `opt.least_squares`.
-            fit_args = (
-                a_raveled_normed_image,
-                self.plas_centroids[i],
-                integral_normalize
-                )
+                elif not optimized_fit['success']:
 
-            fit_kwargs = {}
+                    self.model_fit_results[i][:] = np.nan
 
-            ## If averaging model across pixels add to fit_args
-            if avg_model_over_pixels:
-                fit_kwargs['avg_model_over_pixels'] = avg_model_over_pixels
-            else:
-                pass
+                if return_full_fit_output:
+                    self.full_model_fit_results[i] = optimized_fit
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
 
-            ## Run fit unitil satisfied with molecule position
-            mol_pos_accepted = False
-            fit_quenched_counter = 1
-            fail_to_converge_counter = 1
-
-            while mol_pos_accepted == False:
-                print(f"running fit...")
-                # print(f"self = {self}")
-                ## Perform fit
-                optimized_fit = opt.least_squares(
-                    self._misloc_data_minus_model, ## residual
-                    params0, ## initial guesses
-                    args=fit_args, ## data to fit
-                    kwargs=fit_kwargs,
-                    **least_squares_kwargs
-                    )
+        if not return_full_fit_output:
+            return self.model_fit_results
 
-                ## Check for fit convergence and retry if it failed for a finite
-                ## number of tries.
-                if optimized_fit['success']:
-                    print(f"SUCCESS, Resulting fit params: {optimized_fit['x']}")
-                else:
-                    ## try a few more times with new initial guesses
-                    if fail_to_converge_counter < max_fail_converge:
-                        print(
-                            f"FAILURE, fit not converged, randomize angle "
-                            +
-                            f"guess and try again. Unconverged counter = "
-                            +
-                            f"{fail_to_converge_counter}."
-                            )
-                        fail_to_converge_counter += 1
-                        ## Randomize angle
-                        if not let_mol_ori_out_of_plane:
-                            params0[2] = np.pi * np.random.random(1)
-                        elif let_mol_ori_out_of_plane:
-                            params0[2:] = (
-                                np.array([np.pi/2, np.pi])
-                                *
-                                np.random.random(2)
-                                )
-                        continue
-                    else:
-                        print(
-                            f"FAILURE to converge {fail_to_converge_counter} "
-                            +
-                            "times in a row, giving up."
-                            )
-                        break
+        elif return_full_fit_output:
+            return self.model_fit_results, self.full_model_fit_results
 
-                ## Break loop here if we don't want to iterate through smarter
-                ## initial guesses.
-                if check_fit_loc == False:
-                    # PROCEED NO FURTHER
-                    break
-                elif check_fit_loc == True:
-                    # Proceed to more fits
-                    pass
-
-                ## Check molecule postion from fit
-                fit_loc = optimized_fit['x'][:2]
-                ## True or false?
-                fit_loc_quenched = not MolCoupNanoRodExp.mol_not_quenched(
-                    self,
-                    self.rod_angle,
-                    fit_loc[0],
-                    fit_loc[1],
-                    self.quench_radius_a_nm,
-                    self.quench_radius_c_nm,
-                    )
 
-                if fit_loc_quenched:
-                    # Try fit again, but with a different initial guess.
+    def _warm_started_image_fits(self,
+        image_fit_args,
+        num_of_images,
+        warm_start_radius=None,
+        ):
+        """ Fit images in order, yielding (index, fit result). With
+            'warm_start_radius' given, each fit is seeded with the
+            converged parameters of the nearest earlier image whose
+            initial guess is within 'warm_start_radius'.
+            """
+        ## Initial guesses and fit parameters of converged fits so far
+        done_guesses = []
+        done_params = []
+        for i in range(num_of_images):
+            fit_args = image_fit_args(i)
+            ini_xy = np.array([fit_args['ini_x'], fit_args['ini_y']])
+
+            if warm_start_radius is not None and done_guesses:
+                guess_dists = np.hypot(*(np.array(done_guesses) - ini_xy).T)
+                j = np.argmin(guess_dists)
+                if guess_dists[j] <= warm_start_radius:
+                    ## Translate the neighbor's fit by the change in guess
+                    warm_params = np.array(done_params[j])
+                    warm_params[:2] += ini_xy - done_guesses[j]
+                    fit_args['warm_params'] = warm_params
+
+            optimized_fit = self._fit_model_to_image(**fit_args)
+            if optimized_fit['success']:
+                done_guesses.append(ini_xy)
+                done_params.append(optimized_fit['x'])
 
-                    # ~~~~~~~~~~~~~
-                    # Add radius to initial guess.
-                    on_edge_x, on_edge_y = self._better_init_loc(ini_x, ini_y)
-                    ini_x += on_edge_x
-                    ini_y += on_edge_y
-                    params0[:2] = ini_x, ini_y
+            yield i, optimized_fit
 
-                    ## Randomize angle
-                    if not let_mol_ori_out_of_plane:
-                        params0[2] = np.pi * np.random.random(1)
-                    elif let_mol_ori_out_of_plane:
-                        params0[2:] = np.array([np.pi/2, np.pi]) * np.random.random(2)
+    def _fit_model_to_image(self,
+        i,
+        ini_x,
+        ini_y,
+        a_raveled_normed_image,
+        plas_centroid,
+        check_ini=False,
+        ini_guess_not_quench=None,
+        check_fit_loc=False,
+        max_fail_converge=10,
+        let_mol_ori_out_of_plane=False,
+        integral_normalize=False,
+        avg_model_over_pixels=False,
+        least_squares_kwargs={},
+        warm_params=None,
+        ):
+        """ Fit the model to the 'i'th normalized image, retrying from new
+            initial guesses as set up by 'fit_model_to_image_data', and
+            return the final result of 'opt.least_squares'. If given,
+            'warm_params' are tried first as the initial parameters.
+            """
+        ## Progress goes to the debug log, off by default to keep I/O out
+        ## of the fit loop.
+        logger.debug("Fitting model to molecule %s", i)
+        logger.debug("initial guess position: (%s,%s)", ini_x, ini_y)
+
+        ## Random orientations for the initial guess and each retry, drawn
+        ## together up front. Retries are limited by 'max_fail_converge'
+        ## failed fits and 'max_quenched_fits' quenched ones.
+        max_quenched_fits = 100
+        if not let_mol_ori_out_of_plane:
+            orientation_range = np.array([np.pi])
+        elif let_mol_ori_out_of_plane:
+            orientation_range = np.array([np.pi/2, np.pi])
+        random_orientations = iter(
+            orientation_range
+            *
+            np.random.random(
+                (1 + max_fail_converge + max_quenched_fits,)
+                +
+                orientation_range.shape
+                )
+            )
 
-                    print('fit quenched, ini guess now: {}'.format(params0))
+        ## Randomize initial molecule oriantation, maybe do something
+        ## smarter later.
+        params0 = [ini_x, ini_y, *next(random_orientations)]
+        logger.debug("initial guess angle = %s", params0[2:])
+
+        # Should test inital guess here, since I am only changing the
+        # inital guess. Later loop on fitting could still be healpful later.
+        if check_ini == True:
+            logger.debug(
+                "Checking inital guess, quench radii a = %s nm, c = %s nm",
+                self.quench_radius_a_nm,
+                self.quench_radius_c_nm,
+                )
+            logger.debug("    In quenching zone? %s", not ini_guess_not_quench)
+            if ini_guess_not_quench:
+                # continure to fit
+                pass
 
-                    print(f"Quench counter = {fit_quenched_counter}.")
+            elif not ini_guess_not_quench:
+                # Adjust ini_guess to be outsie quenching zone
+                logger.debug(
+                    "Initial guess in quench. Zone, OG params: %s", params0)
+                on_edge_x, on_edge_y = self._better_init_loc(ini_x, ini_y)
+                ini_x += on_edge_x
+                ini_y += on_edge_y
+                params0[:2] = ini_x, ini_y
+                logger.debug("Params shifted to: %s", params0)
+
+        ## Start from the given parameters instead, keeping the guess above
+        ## to fall back on if that fit fails to converge.
+        cold_params0 = params0
+        if warm_params is not None:
+            params0 = list(warm_params)
+            logger.debug("warm start params = %s", params0)
+
+        ## Place image data and plasmon location in tp tuple as required
+        ## by `opt.least_squares`.
+        fit_args = (
+            a_raveled_normed_image,
+            plas_centroid,
+            integral_normalize
+            )
 
-                    fit_quenched_counter += 1
+        fit_kwargs = {}
 
-                    if fit_quenched_counter > 100:
-                        ## Give up
-                        mol_pos_accepted = True
-                        print(
-                            f"Giving up, fit pos. quenched but accepted")
+        ## If averaging model across pixels add to fit_args
+        if avg_model_over_pixels:
+            fit_kwargs['avg_model_over_pixels'] = avg_model_over_pixels
+        else:
+            pass
 
-                elif not fit_loc_quenched:
-                    # Fit location is far enough away from rod to be
-                    # reasonable
-                    mol_pos_accepted = True
-                    print(
-                        f"Fit pos. ACCEPTED as unquenched: took "
-                        +
-                        f"{fit_quenched_counter}"
-                        +
-                        " fit(s).")
+        ## Batched Jacobian and unbounded Levenberg-Marquardt, with
+        ## tolerances suited to noisy pixel images, unless others are
+        ## asked for.
+        ls_kwargs = dict(
+            jac=self._misloc_data_minus_model_jac,
+            method='lm',
+            ftol=1e-6,
+            xtol=1e-6,
+            gtol=1e-6,
+            )
+        if 'bounds' in least_squares_kwargs:
+            ## 'lm' cannot handle bounds
+            ls_kwargs['method'] = 'trf'
+        ls_kwargs.update(least_squares_kwargs)
+
+        ## Quenching ellipse for checking fit positions in the loop
+        M_xx, M_xy, M_yy = quench_ellipse_form(
+            np.cos(self.rod_angle),
+            np.sin(self.rod_angle),
+            self.quench_radius_a_nm,
+            self.quench_radius_c_nm,
+            )
+
+        ## Start this image with an empty model cache
+        self._model_cache = {}
+
+        ## Run fit unitil satisfied with molecule position
+        mol_pos_accepted = False
+        fit_quenched_counter = 1
+        fail_to_converge_counter = 1
+
+        while mol_pos_accepted == False:
+            logger.debug("running fit...")
+            ## Perform fit
+            optimized_fit = opt.least_squares(
+                self._misloc_data_minus_model, ## residual
+                params0, ## initial guesses
+                args=fit_args, ## data to fit
+                kwargs=fit_kwargs,
+                **ls_kwargs
+                )
 
-            # We satisfied apparently.
-            # Store fit result parameters as class instance attribute.
+            ## Check for fit convergence and retry if it failed for a finite
+            ## number of tries.
             if optimized_fit['success']:
-                self.model_fit_results[i][:2] = optimized_fit['x'][:2]
-                # Project fit result angles to first quadrant
-                if not let_mol_ori_out_of_plane:
-                    angle_in_first_quad = self.map_angles_to_first_quad(
-                        optimized_fit['x'][2]
+                logger.debug(
+                    "SUCCESS, Resulting fit params: %s", optimized_fit['x'])
+            else:
+                ## try a few more times with new initial guesses
+                if fail_to_converge_counter < max_fail_converge:
+                    logger.debug(
+                        "FAILURE, fit not converged, randomize angle "
+                        +
+                        "guess and try again. Unconverged counter = %s.",
+                        fail_to_converge_counter,
                         )
-                elif let_mol_ori_out_of_plane:
-                    angle_in_first_quad = optimized_fit['x'][2:]
+                    fail_to_converge_counter += 1
+                    if params0 is not cold_params0:
+                        ## Drop the warm start
+                        params0 = cold_params0
+                        continue
+                    ## Randomize angle
+                    params0[2:] = next(random_orientations)
+                    continue
+                else:
+                    logger.debug(
+                        "FAILURE to converge %s times in a row, giving up.",
+                        fail_to_converge_counter,
+                        )
+                    break
 
-                self.model_fit_results[i][2:] = angle_in_first_quad
+            ## Break loop here if we don't want to iterate through smarter
+            ## initial guesses.
+            if check_fit_loc == False:
+                # PROCEED NO FURTHER
+                break
+            elif check_fit_loc == True:
+                # Proceed to more fits
+                pass
 
-            elif not optimized_fit['success']:
+            ## Check molecule postion from fit
+            fit_x, fit_y = optimized_fit['x'][:2]
+            ## True or false?
+            fit_loc_quenched = not (
+                (M_xx*fit_x + 2*M_xy*fit_y)*fit_x + M_yy*fit_y**2 > 1)
 
-                self.model_fit_results[i][:] = np.nan
+            if fit_loc_quenched:
+                # Try fit again, but with a different initial guess.
 
-            if return_full_fit_output:
-                self.full_model_fit_results[i] = optimized_fit
+                # ~~~~~~~~~~~~~
+                # Add radius to initial guess.
+                on_edge_x, on_edge_y = self._better_init_loc(ini_x, ini_y)
+                ini_x += on_edge_x
+                ini_y += on_edge_y
+                params0[:2] = ini_x, ini_y
 
-        if not return_full_fit_output:
-            return self.model_fit_results
+                ## Randomize angle
+                params0[2:] = next(random_orientations)
 
-        elif return_full_fit_output:
-            return self.model_fit_results, self.full_model_fit_results
+                logger.debug("fit quenched, ini guess now: %s", params0)
+
+                logger.debug("Quench counter = %s.", fit_quenched_counter)
+
+                fit_quenched_counter += 1
+
+                if fit_quenched_counter > max_quenched_fits:
+                    ## Give up
+                    mol_pos_accepted = True
+                    logger.debug("Giving up, fit pos. quenched but accepted")
+
+            elif not fit_loc_quenched:
+                # Fit location is far enough away from rod to be
+                # reasonable
+                mol_pos_accepted = True
+                logger.debug(
+                    "Fit pos. ACCEPTED as unquenched: took %s fit(s).",
+                    fit_quenched_counter,
+                    )
+
+        return optimized_fit
 
 
     def map_angles_to_first_quad(self, angles):
-        angle_in_first_quad = np.arctan(
-            np.abs(np.sin(angles))
-            /
-            np.abs(np.cos(angles))
-            )
+        ## Orientations are pi periodic and mirror symmetric about x, so
+        ## fold into [0, pi) and reflect the second quadrant. Equivalent to
+        ## arctan(|sin|/|cos|) without the division at pi/2.
+        angles_mod_pi = np.mod(angles, np.pi)
+        angle_in_first_quad = np.minimum(angles_mod_pi, np.pi - angles_mod_pi)
         return angle_in_first_quad
 
     # def map_angles_to_first_two_quads(self, angles):
@@ -1949,12 +2319,19 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
             """
         ## Move initial guess outside quenching zone.
         #
-        # Convert position to polar coords
-        circ_angl = afi.phi(ini_x, ini_y)
-        # sub radius with ellipse radius at given angle
-        radius = self._polar_ellipse_semi_r(circ_angl)
-        # convert back to cartisean and shift guess outward by a radius
-        smarter_ini_x, smarter_ini_y = self.circ_to_cart(radius, circ_angl)
+        # Direction of the guess from the plasmon, without trig
+        cos_phi, sin_phi = afi.cos_sin_phi(ini_x, ini_y, np.hypot(ini_x, ini_y))
+        # ellipse radius in that direction, as in _polar_ellipse_semi_r
+        a = self.quench_radius_a_nm
+        c = self.quench_radius_c_nm
+        radius = a*c/np.sqrt(
+            c**2. * sin_phi**2.
+            +
+            a**2. * cos_phi**2.
+            )
+        # shift guess outward by a radius
+        smarter_ini_x = radius*cos_phi
+        smarter_ini_y = radius*sin_phi
 
         return smarter_ini_x, smarter_ini_y
 
@@ -1991,51 +2368,90 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
                 'ini_y' : units of nm from plas position
                 'ini_mol_orintation' : units of radians counter-clock from +x
         '''
-        ## Get arguments and name them
         normed_raveled_image_data = fit_args[0]
-        plas_centroid = fit_args[1]
-        if len(fit_args) == 3:
-            integral_normalize = fit_args[2]
-        elif len(fit_args) == 2:
-            integral_normalize = False
-
-        ## Get arg to determine wheter pixelated model is calculated
-        ## by averageing model across each pixel.
-        if 'avg_model_over_pixels' in fit_kwargs:
-            avg_model_over_pixels = fit_kwargs['avg_model_over_pixels']
-        else:
-            avg_model_over_pixels = False
+        normed_raveled_model, = self._normed_raveled_models(
+            np.atleast_2d(fit_params),
+            *fit_args[1:],
+            **fit_kwargs
+            )
+        return normed_raveled_model - normed_raveled_image_data
 
+    def _misloc_data_minus_model_jac(self,
+        fit_params,
+        *fit_args,
+        **fit_kwargs,
+        ):
+        ''' Forward difference Jacobian of '_misloc_data_minus_model',
+            with the steps of opt.least_squares' '2-point' scheme. The model
+            images at the parameters and every step are computed together
+            as one batch of molecules.
+        '''
+        fit_params = np.asarray(fit_params, dtype=float)
+        steps = (
+            np.finfo(float).eps**0.5
+            *
+            np.where(fit_params >= 0, 1., -1.)
+            *
+            np.maximum(1, np.abs(fit_params))
+            )
+        ## Use the step that is exactly representable in the parameters
+        steps = (fit_params + steps) - fit_params
+
+        params_and_steps = np.vstack((fit_params, fit_params + np.diag(steps)))
+        normed_raveled_models = self._normed_raveled_models(
+            params_and_steps,
+            *fit_args[1:],
+            **fit_kwargs
+            )
+        return (
+            (normed_raveled_models[1:] - normed_raveled_models[0]).T
+            /
+            steps
+            )
+
+    def _normed_raveled_models(self,
+        fit_params,
+        plas_centroid,
+        integral_normalize=False,
+        avg_model_over_pixels=False,
+        ):
+        ''' Normalized raveled model images for each row of 'fit_params',
+            shape (number of rows, number of pixels).
+        '''
         ## Define model image, with 'for_plot' param increasing image
         ## resolution for pixel averaging.
-        raveled_model = self.raveled_model_of_params(
+        raveled_models = self.raveled_models_of_params(
             fit_params,
             plas_centroid=plas_centroid,
             for_plot=avg_model_over_pixels
             )
+        num_models = raveled_models.shape[0]
 
         if avg_model_over_pixels:
-            ## Average model over pixels.
-            ## start by reshaping image
-            image_array = raveled_model.reshape(self.plt_obs_points[-2].shape)
-            ## Perform the pixel average
-            # image_array = self.bin_ndarray(image_array, self.obs_points[-2].shape)
-            image_array = self.rebin(image_array, self.obs_points[-2].shape)
-            ## unravel again
-            raveled_model = image_array.ravel()
-
+            ## Average model over pixels, as a block mean of the supersampled
+            ## grid taken straight from the raveled images.
+            hi_res_x, hi_res_y = self.plt_obs_points[-2].shape
+            pixels_x, pixels_y = self.obs_points[-2].shape
+            raveled_models = raveled_models.reshape(
+                num_models,
+                pixels_x, hi_res_x//pixels_x,
+                pixels_y, hi_res_y//pixels_y,
+                ).mean(axis=(2, 4)).reshape(num_models, -1)
 
         if integral_normalize:
-            normed_raveled_model = raveled_model/(
-                raveled_model.sum()
+            model_norms = (
+                raveled_models.sum(axis=-1, keepdims=True)
                 /
-                (self.sensor_size/cm_per_nm)**2. ## A in cm
+                self._integral_norm_area
                 )
 
         elif not integral_normalize:
-            normed_raveled_model = raveled_model/np.max(raveled_model)
+            model_norms = np.max(raveled_models, axis=-1, keepdims=True)
 
-        return normed_raveled_model - normed_raveled_image_data
+        ## The models are a fresh array here, so scale them in place by the
+        ## reciprocal norms.
+        raveled_models *= 1/model_norms
+        return raveled_models
 
     def raveled_model_of_params(self,
         fit_params,
@@ -2045,19 +2461,66 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
         """ Returns raveled model image as a function of fit parameters.
             'for_plot' uses higher res 'obs_points'.
             """
-        ## Add z-dimension to molecule locations
-        locations = np.array([[fit_params[0], fit_params[1], 0]])
+        return self.raveled_models_of_params(
+            np.atleast_2d(fit_params),
+            plas_centroid,
+            for_plot=for_plot,
+            )[0]
+
+    def raveled_models_of_params(self,
+        fit_params,
+        plas_centroid,
+        for_plot=False
+        ):
+        """ Returns raveled model images for each row of fit parameters,
+            evaluated together as one batch of molecules.
+            'for_plot' uses higher res 'obs_points'.
 
-        ## add z-dimension to plasmon location
-        plas_centroid = np.array([[plas_centroid[0], plas_centroid[1], 0]])
+            Images are remembered by their exact parameters, so repeated
+            evaluations (least_squares asks for the residual and then the
+            Jacobian at the same point) are only rendered once.
+            """
+        fit_params = np.asarray(fit_params, dtype=float)
+
+        model_cache = getattr(self, '_model_cache', None)
+        if model_cache is None or len(model_cache) > 256:
+            model_cache = self._model_cache = {}
+        cache_keys = [
+            (for_plot, plas_centroid[0], plas_centroid[1]) + tuple(params)
+            for params in fit_params
+            ]
+        missing = [
+            i for i, key in enumerate(cache_keys) if key not in model_cache
+            ]
+        if missing:
+            new_models = self._render_raveled_models(
+                fit_params[missing], plas_centroid, for_plot)
+            for i, model in zip(missing, new_models):
+                model_cache[cache_keys[i]] = model
+
+        return np.stack([model_cache[key] for key in cache_keys])
+
+    def _render_raveled_models(self,
+        fit_params,
+        plas_centroid,
+        for_plot=False
+        ):
+        """ Computes raveled model images for each row of fit parameters
+            as one batch of molecules.
+            """
+        num_models = fit_params.shape[0]
+
+        ## Add z-dimension to molecule locations
+        locations = np.zeros((num_models, 3))
+        locations[:, :2] = fit_params[:, :2]
 
         ## np.least_squares doesn't want to take a nested list for the
-        ## 3D molecule, so here we assume that is fit_params is len = 4
-        ## then elements 2 and 3 are theta and phi
-        if len(fit_params) == 3:
-            _angle = fit_params[2]
-        elif len(fit_params) == 4:
-            _angle = np.array([[fit_params[2], fit_params[3]]])
+        ## 3D molecule, so here we assume that is fit_params has 4 columns
+        ## then columns 2 and 3 are theta and phi
+        if fit_params.shape[1] == 3:
+            _angle = fit_params[:, 2]
+        elif fit_params.shape[1] == 4:
+            _angle = fit_params[:, 2:4]
         else:
             raise ValueError("Wrong number of model parameters, must "/
              "be 3 for molecule oriented in focal plane, or 4 if 3D.")
@@ -2066,38 +2529,65 @@ class FitModelToData(CoupledDipoles, BeamSplitter):
         elif for_plot:
             obs_points = self.plt_obs_points
 
-        ## Define model instance
-        exp_instance = MolCoupNanoRodExp(
-            locations,
-            mol_angle=_angle,
-            plas_centroid=plas_centroid,
-            plas_angle=self.rod_angle,
-            obs_points=obs_points,
-            for_fit=True,
-            ## List system parameters to eliminate repetative reference
-            ## to .yaml during fit routine.
-            drive_energy_eV=self.drive_energy_eV,
-            eps_inf=self.eps_inf,
-            omega_plasma=self.omega_plasma,
-            gamma_drude=self.gamma_drude,
-            a_long_meters=self.a_long_meters,
-            a_short_meters=self.a_short_meters,
-            eps_b=self.eps_b,
-            fluo_quench_range=self.fluo_quench_range,
-            fluo_ext_coef=self.fluo_ext_coef,
-            fluo_mass_hbar_gamma=self.fluo_mass_hbar_gamma,
-            fluo_nr_hbar_gamma=self.fluo_nr_hbar_gamma,
-            drive_I=self.drive_I,
-            sensor_size=self.sensor_size,
-            is_sphere=self.is_sphere,
-            drive_amp=self.drive_amp,
-            sphere_model=self.sphere_model
+        ## Only the molecule changes between residual evaluations, so the
+        ## model instance (dipole properties, observation grid) is built once
+        ## per plasmon centroid and resolution and its images recomputed.
+        exp_instances = getattr(self, '_fit_exp_instances', None)
+        if exp_instances is None:
+            exp_instances = self._fit_exp_instances = {}
+        exp_key = (for_plot, plas_centroid[0], plas_centroid[1])
+
+        exp_instance = exp_instances.get(exp_key)
+        if exp_instance is None:
+            ## add z-dimension to plasmon location, only needed when the
+            ## instance is first built.
+            plas_centroid = np.array(
+                [[plas_centroid[0], plas_centroid[1], 0]])
+
+            ## Define model instance
+            exp_instance = MolCoupNanoRodExp(
+                locations,
+                mol_angle=_angle,
+                plas_centroid=plas_centroid,
+                plas_angle=self.rod_angle,
+                obs_points=obs_points,
+                for_fit=True,
+                ## List system parameters to eliminate repetative reference
+                ## to .yaml during fit routine.
+                drive_energy_eV=self.drive_energy_eV,
+                eps_inf=self.eps_inf,
+                omega_plasma=self.omega_plasma,
+                gamma_drude=self.gamma_drude,
+                a_long_meters=self.a_long_meters,
+                a_short_meters=self.a_short_meters,
+                eps_b=self.eps_b,
+                fluo_quench_range=self.fluo_quench_range,
+                fluo_ext_coef=self.fluo_ext_coef,
+                fluo_mass_hbar_gamma=self.fluo_mass_hbar_gamma,
+                fluo_nr_hbar_gamma=self.fluo_nr_hbar_gamma,
+                drive_I=self.drive_I,
+                sensor_size=self.sensor_size,
+                is_sphere=self.is_sphere,
+                drive_amp=self.drive_amp,
+                sphere_model=self.sphere_model
+                )
+            exp_instances[exp_key] = exp_instance
+        else:
+            exp_instance.recompute_images(locations, _angle)
+
+        ## Get model images
+        raveled_models = exp_instance.anal_images.reshape(num_models, -1)
+
+        ## The instance is only cached for its setup, so don't hold on to
+        ## the fields of this batch until the next one replaces them.
+        del (
+            exp_instance.mol_E,
+            exp_instance.plas_E,
+            exp_instance.p0_unc_E,
+            exp_instance.anal_images,
             )
 
-        ## Get model image
-        raveled_model = exp_instance.anal_images[0].ravel()
-
-        return raveled_model
+        return raveled_models
 
     def plot_image_from_params(self, fit_params, plas_centroid, ax=None):
         raveled_image = self.raveled_model_of_params(
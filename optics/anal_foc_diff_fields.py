@@ -13,6 +13,48 @@ def phi(x, y):
 def rho(x, y):
     return ( x**2. + y**2. )**0.5
 
+def cos_sin_phi(x, y, rho_xy=None):
+    """ cos and sin of 'phi(x, y)', which are just the normalized
+        coordinates, so no trig is needed. As with 'phi', the angle is 0
+        at the origin. 'rho_xy' can be passed if already computed.
+        """
+    if rho_xy is None:
+        rho_xy = rho(x, y)
+    at_origin = rho_xy == 0
+    rho_xy = np.where(at_origin, 1., rho_xy)
+    cos_phi = np.where(at_origin, 1., x/rho_xy)[()]
+    sin_phi = np.where(at_origin, 0., y/rho_xy)[()]
+    return cos_phi, sin_phi
+
+def spherical_j012(z, small_z=0.5, series_terms=8):
+    """ Spherical Bessel functions of the first kind of orders 0, 1 and 2
+        for real z >= 0, from their closed forms which share one sin and
+        one cos. Below 'small_z' the closed forms lose precision to
+        cancellation, so the power series is summed there instead.
+        """
+    z = np.asarray(z)
+    sin_z = np.sin(z)
+    cos_z = np.cos(z)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        j0 = sin_z/z
+        j1 = (j0 - cos_z)/z
+        j2 = 3*j1/z - j0
+
+    small = z < small_z
+    if np.any(small):
+        z_small = z[small]
+        ## j_n = z^n sum_k (-z^2/2)^k / (k! (2n+2k+1)!!)
+        minus_half_z_sqrd = -0.5*z_small**2.
+        for n, j_n, leading in ((0, j0, 1.), (1, j1, 1/3), (2, j2, 1/15)):
+            term = leading*z_small**n
+            total = term
+            for k in range(1, series_terms):
+                term = term*minus_half_z_sqrd/(k*(2*n + 2*k + 1))
+                total = total + term
+            j_n[small] = total
+
+    return j0, j1, j2
+
 def E_field(dipole_orientation_angle, xi, y, k):
     """ Defines the analytics approximation to the focused and
         diffracted field for dipole oriented in the
@@ -21,84 +63,105 @@ def E_field(dipole_orientation_angle, xi, y, k):
         """
 
     psi = dipole_orientation_angle
-    phi_P = phi(xi, y) - psi
+    cos_psi = np.cos(psi)
+    sin_psi = np.sin(psi)
+
+    ## Radial argument and Bessel functions shared by all components
+    rho_xy = rho(xi, y)
+    krho = k*rho_xy
+    at_origin = krho == 0
+    sphj0, sphj1, sphj2 = spherical_j012(krho)
 
     ## Define Bessel ratios with limits explicitly to ovoid divergent division
-    sphj1_on_krho = spf.spherical_jn( 1, k*rho(xi, y) )/(k*rho(xi, y))
-    sphj1_on_krho[k*rho(xi, y) == 0] = 1/3
+    sphj1_on_krho = np.divide(
+        sphj1, krho, out=np.full_like(krho, 1/3), where=~at_origin)
     ##
-    j2_on_krho = spf.jv(2, k*rho(xi, y) )/(k*rho(xi, y))
-    j2_on_krho[k*rho(xi, y) == 0] = 0
+    j2_on_krho = np.divide(
+        spf.jv(2, krho), krho, out=np.zeros_like(krho), where=~at_origin)
 
+    ## Angle from the dipole, phi_P = phi - psi, by the difference formulas
+    cos_phi, sin_phi = cos_sin_phi(xi, y, rho_xy)
+    cos_phi_P = cos_phi*cos_psi + sin_phi*sin_psi
+    sin_phi_P = sin_phi*cos_psi - cos_phi*sin_psi
+    cos_phi_P_sqrd = cos_phi_P**2.
+
+    ## cos^2 + cos(2 phi) = 3 cos^2 - 1 and sin^2 = 1 - cos^2
     E_xP = (
-            (
-                np.cos( phi_P )**2.
-                +
-                np.cos( 2*(phi_P) )
-                )
+            (3*cos_phi_P_sqrd - 1)
             *
             sphj1_on_krho
         +
         (
-            np.sin( phi_P )**2.
+            (1 - cos_phi_P_sqrd)
             *
-            spf.spherical_jn( 0, k*rho(xi, y) )
+            sphj0
             )
         )
 
     E_yP = (
-        np.sin(phi_P)
+        sin_phi_P
         *
-        np.cos(phi_P)
+        cos_phi_P
         *
-        spf.spherical_jn( 2, k*rho(xi, y) )
+        sphj2
         )
 
-    # print("rho(xi, y) = ",rho(xi, y))
-    # print("xi, y = ",xi, ' ',y)
-    E_zP = -np.cos(phi_P) * j2_on_krho
+    E_zP = -cos_phi_P * j2_on_krho
 
 
-    E_x = np.cos(psi)*E_xP - np.sin(psi)*E_yP
-    E_y = np.sin(psi)*E_xP + np.cos(psi)*E_yP
-    E_z = E_zP
+    ## Rotate out of the dipole frame, writing the components straight into
+    ## the output array and scaling it in place.
+    E = np.empty(
+        (3,) + E_xP.shape, dtype=np.result_type(E_xP, E_yP, E_zP))
+    np.multiply(cos_psi, E_xP, out=E[0])
+    E[0] -= sin_psi*E_yP
+    np.multiply(sin_psi, E_xP, out=E[1])
+    E[1] += cos_psi*E_yP
+    E[2] = E_zP
 
-    return np.array([E_x, E_y, E_z])*k**3.
+    E *= k**3.
+    return E
 
 
 def E_pz(xi, y, k):
     """ Defines the analytics approximation to the focused and
         diffracted field for dipole oriented along the optical axis.
         """
-    phi_P = phi(xi, y)
-
-    j2_on_krho = spf.jv(2, k*rho(xi, y) )/(k*rho(xi, y))
-    j2_on_krho[k*rho(xi, y) == 0] = 0
-
-    sphj0_on_krhosqrd = spf.spherical_jn(0, k*rho(xi, y) )/(k*rho(xi, y))**2.
-    sphy1_plus_sphj0_on_krhosqrd = (
-        spf.spherical_yn(1, k*rho(xi, y) )
-        +
-        sphj0_on_krhosqrd
-        )
-    sphy1_plus_sphj0_on_krhosqrd[k*rho(xi, y) == 0] = -2/3
-
-
-    E_x = 1j*(
-        j2_on_krho
-        *
-        np.cos(phi_P)
-        )
+    ## Radial argument and polar angle shared by all components
+    rho_xy = rho(xi, y)
+    krho = k*rho_xy
+    at_origin = krho == 0
+    cos_phi, sin_phi = cos_sin_phi(xi, y, rho_xy)
+
+    j2_on_krho = np.divide(
+        spf.jv(2, krho), krho, out=np.zeros_like(krho), where=~at_origin)
+
+    ## Closed forms j0 = sin/z and y1 = -cos/z^2 - sin/z, sharing the trig
+    ## (diverging at the origin, where the limit is set below)
+    sin_krho = np.sin(krho)
+    cos_krho = np.cos(krho)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sphj0_on_krhosqrd = sin_krho/krho**3.
+        sphy1_plus_sphj0_on_krhosqrd = (
+            (-cos_krho/krho - sin_krho)/krho
+            +
+            sphj0_on_krhosqrd
+            )
+    sphy1_plus_sphj0_on_krhosqrd[at_origin] = -2/3
 
-    E_y = -1j*(
-        j2_on_krho
-        *
-        np.sin(phi_P)
+    ## E_x and E_y are purely imaginary and E_z real, so fill the parts of
+    ## the output array directly and scale it in place.
+    E = np.zeros(
+        (3,) + krho.shape,
+        dtype=np.result_type(j2_on_krho, sphy1_plus_sphj0_on_krhosqrd, 1j),
         )
+    np.multiply(j2_on_krho, cos_phi, out=E[0].imag)
+    np.multiply(j2_on_krho, sin_phi, out=E[1].imag)
+    np.negative(E[1].imag, out=E[1].imag)
+    np.negative(sphy1_plus_sphj0_on_krhosqrd, out=E[2].real)
 
-    E_z = -sphy1_plus_sphj0_on_krhosqrd
-
-    return np.array([E_x, E_y, E_z])*k**3.
+    E *= k**3.
+    return E
 
 
 def old_E_pz(xi, y, k):
@@ -107,16 +170,21 @@ def old_E_pz(xi, y, k):
         """
     phi_P = phi(xi, y)
 
-    j2_on_krho = spf.jv(2, k*rho(xi, y) )/(k*rho(xi, y))
-    j2_on_krho[k*rho(xi, y) == 0] = 0
+    ## Radial argument shared by all components
+    krho = k*rho(xi, y)
+    at_origin = krho == 0
+
+    j2_on_krho = spf.jv(2, krho)/krho
+    j2_on_krho[at_origin] = 0
 
-    sphj0_on_krhosqrd = spf.spherical_jn(0, k*rho(xi, y) )/(k*rho(xi, y))**2.
+    sphj0 = spf.spherical_jn(0, krho)
+    sphj0_on_krhosqrd = sphj0/krho**2.
     sphy1_plus_sphj0_on_krhosqrd = (
-        spf.spherical_yn(1, k*rho(xi, y) )
+        spf.spherical_yn(1, krho)
         +
         sphj0_on_krhosqrd
         )
-    sphy1_plus_sphj0_on_krhosqrd[k*rho(xi, y) == 0] = -2/3
+    sphy1_plus_sphj0_on_krhosqrd[at_origin] = -2/3
 
 
     E_x = (
@@ -131,7 +199,7 @@ def old_E_pz(xi, y, k):
         np.sin(phi_P)
         )
 
-    E_z = 2/3 * spf.spherical_jn(0, k*rho(xi, y)) - 1/3*spf.spherical_jn(2, k*rho(xi, y))
+    E_z = 2/3 * sphj0 - 1/3*spf.spherical_jn(2, krho)
 
     return np.array([E_x, E_y, E_z])*k**3.
 
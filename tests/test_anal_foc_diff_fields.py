@@ -0,0 +1,26 @@
+import numpy as np
+
+import scipy.special as spf
+
+## Load custom package modules
+from ..optics import anal_foc_diff_fields as afi
+
+
+def test_spherical_j012_matches_scipy():
+    """ Closed forms above 'small_z' and the power series below it should
+        both agree with scipy's spherical Bessel functions, including at
+        the origin and on either side of the switch.
+        """
+    small_z = 0.5
+    z = np.concatenate([
+        [0, 1e-8, 1e-3],
+        np.linspace(0.01, 2*small_z, 101),
+        small_z + np.array([-1e-12, 0, 1e-12]),
+        np.linspace(1, 60, 200),
+        ])
+
+    j0, j1, j2 = afi.spherical_j012(z, small_z=small_z)
+
+    for n, j_n in enumerate([j0, j1, j2]):
+        assert np.allclose(
+            j_n, spf.spherical_jn(n, z), rtol=1e-10, atol=1e-14)
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+import scipy.integrate as inte
+
+## Load custom package modules
+from ..calc import coupled_dipoles as cp
+
+
+def L_by_quadrature(a, b, c):
+    """ Geometric factor 'L' for semi-axis 'a' from the defining integral.
+        """
+    integrand = lambda q: 1/(
+        (a**2. + q) * ((a**2. + q) * (b**2. + q) * (c**2. + q))**0.5
+        )
+    return (a*b*c/2) * inte.quad(
+        integrand, 0, np.inf, epsabs=0, epsrel=1e-12, limit=200)[0]
+
+def test_ellipsoid_depolarization_factors_match_quadrature():
+    """ Closed form factors should agree with the integral definition for
+        general ellipsoids and the spheroid/sphere limits.
+        """
+    for radii in [
+        (50, 30, 10),
+        (10, 50, 30),
+        (44, 20, 20),
+        (30, 30, 10),
+        (20, 20, 20),
+        ]:
+        a, b, c = radii
+        L = cp.ellipsoid_depolarization_factors(*radii)
+        L_quad = [
+            L_by_quadrature(a, b, c),
+            L_by_quadrature(b, c, a),
+            L_by_quadrature(c, a, b),
+            ]
+        assert np.allclose(L, L_quad, rtol=1e-6)
+        assert np.isclose(np.sum(L), 1)
+
+def test_solve_3x3_matches_linalg_solve():
+    """ Batched Cramer's rule solve should match LAPACK for complex systems
+        with broadcast leading dimensions.
+        """
+    rng = np.random.RandomState(0)
+    A = rng.randn(5, 4, 3, 3) + 1j*rng.randn(5, 4, 3, 3)
+    b = rng.randn(4, 3) + 1j*rng.randn(4, 3)
+
+    x = cp.solve_3x3(A, b)
+
+    assert x.shape == (5, 4, 3)
+    assert np.allclose(x, np.linalg.solve(A, b[None, ..., None])[..., 0])
+
+    ## Degenerate polarizability, as for a molecule polarizable along x
+    singular_A = np.array([A[0, 0], np.diag([1+1j, 0, 0])])
+    with pytest.raises(np.linalg.LinAlgError):
+        cp.solve_3x3(singular_A, b[:2])
+
+def test_inv_3x3_matches_linalg_inv():
+    """ Closed form inverse should match LAPACK for a complex batch.
+        """
+    rng = np.random.RandomState(1)
+    A = rng.randn(6, 3, 3) + 1j*rng.randn(6, 3, 3)
+
+    assert np.allclose(cp.inv_3x3(A), np.linalg.inv(A))
+
+    singular_A = A.copy()
+    singular_A[2] = np.diag([1+1j, 0, 0])
+    with pytest.raises(np.linalg.LinAlgError):
+        cp.inv_3x3(singular_A)
+
+def test_rotate_molecule_batches_out_of_plane_angles():
+    """ A batch of (theta, phi) molecule angles should rotate each
+        molecule as if it were rotated alone.
+        """
+    angles = np.array([[0.3, 1.1], [1.2, -0.4], [np.pi/2, 2.]])
+    alpha0_diag = np.diag([2., 0, 0])
+
+    alpha_0, E_drive = cp.rotate_molecule(angles, alpha0_diag, None, 3.)
+
+    assert E_drive.shape == (3, 3)
+    for i in range(len(angles)):
+        alpha_0_i, E_drive_i = cp.rotate_molecule(
+            angles[i:i+1], alpha0_diag, None, 3.)
+        assert np.allclose(alpha_0[i], alpha_0_i[0])
+        assert np.allclose(E_drive[i], E_drive_i[0])
+
+def test_partial_scattering_full_sphere_matches_total_scattering():
+    """ Integrating the far field over the whole sphere should recover
+        the total dipole scattering cross section.
+        """
+    hbar_w = 2.
+    p = np.array([[1e-17 + 3e-18j, -2e-18j, 5e-18]])
+    p_of_w = lambda w: p
+
+    sigma_cap = cp.partial_scattering(
+        np.pi, p_of_w, np.zeros(3), hbar_w, 1.33, 1., num_int_points=2001)
+    sigma = cp.single_dip_sigma_scat(
+        lambda w: [p], hbar_w, n_b=1.33, E_0=1.)
+
+    assert np.allclose(sigma_cap, sigma, rtol=1e-6)
+
+def test_partial_scattering_cap_fraction_of_x_dipole():
+    """ Fraction of an x dipole's power through a cap of half angle pi/3
+        about z, analytically [2(1-c) - (2/3 - c + c^3/3)]/(8/3) with
+        c = cos(pi/3).
+        """
+    hbar_w = 2.
+    p_of_w = lambda w: np.array([[1e-17, 0, 0]])
+    max_angle = np.pi/3
+
+    fraction = (
+        cp.partial_scattering(
+            max_angle, p_of_w, np.zeros(3), hbar_w, 1.33, 1.,
+            num_int_points=2001)
+        /
+        cp.partial_scattering(
+            np.pi, p_of_w, np.zeros(3), hbar_w, 1.33, 1.,
+            num_int_points=2001)
+        )
+    cos_max = np.cos(max_angle)
+    analytic = (
+        2*(1 - cos_max) - (2/3 - cos_max + cos_max**3./3)
+        )/(8/3)
+
+    assert np.allclose(fraction, analytic, rtol=1e-3)
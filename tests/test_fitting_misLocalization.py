@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+## Load custom package modules
+from ..calc import fitting_misLocalization as fit
+
+
+param_file = 'disk_JC_d70_transFit_expRes'
+
+def central_difference_jacobian(f, params, rel_step=1e-6):
+    """ Jacobian of vector function 'f' by central differences, shape
+        (len(f(params)), len(params)).
+        """
+    params = np.asarray(params, dtype=float)
+    columns = []
+    for i in range(params.size):
+        step = rel_step*max(1, abs(params[i]))
+        params_up = params.copy()
+        params_down = params.copy()
+        params_up[i] += step
+        params_down[i] -= step
+        columns.append((f(params_up) - f(params_down))/(2*step))
+    return np.stack(columns, axis=-1)
+
+def test_twoD_Gaussian_jacobian_matches_finite_differences():
+    """ Analytic Jacobian of the rotated Gaussian should match central
+        differences of 'twoD_Gaussian' on the image grid.
+        """
+    tools = fit.FittingTools(param_file=param_file)
+    X = (tools.obs_x_nm, tools.obs_y_nm)
+    ## ( A, xo, yo, sigma_x, sigma_y, theta, offset)
+    params = [1.3, 40., -25., 180., 120., 0.4, 0.05]
+
+    jac = tools.twoD_Gaussian_jacobian(X, *params)
+    jac_fd = central_difference_jacobian(
+        lambda p: tools.twoD_Gaussian(X, *p), params)
+
+    assert jac.shape == (tools.obs_x_nm.size, 7)
+    assert np.allclose(jac, jac_fd, rtol=1e-5, atol=1e-7*np.abs(jac).max())
+
+def test_model_fit_jacobian_matches_finite_differences():
+    """ Batched Jacobian of the image model residual should match central
+        differences of the residual, for molecules in the focal plane and
+        for out of plane (theta, phi) molecules.
+        """
+    locations = np.array([[60., 40., 0.], [-30., 90., 0.]])
+    data = fit.MolCoupNanoRodExp(
+        locations,
+        mol_angle=np.array([0.3, 1.2]),
+        plas_angle=np.pi/2,
+        param_file=param_file,
+        for_fit=True,
+        )
+    images = data.anal_images
+    fit_inst = fit.FitModelToData(images, param_file=param_file)
+    plas_centroid = np.zeros(2)
+
+    for params, integral_normalize in [
+        ([55., 45., 0.5], False),
+        ([55., 45., 0.5], True),
+        ([-25., 85., 1.3, 0.9], False),
+        ]:
+        fit_args = (
+            images[0]/images[0].max(),
+            plas_centroid,
+            integral_normalize,
+            )
+        jac = fit_inst._misloc_data_minus_model_jac(params, *fit_args)
+        jac_fd = central_difference_jacobian(
+            lambda p: fit_inst._misloc_data_minus_model(p, *fit_args),
+            params,
+            )
+
+        assert jac.shape == (images.shape[-1], len(params))
+        assert np.allclose(jac, jac_fd, rtol=0, atol=1e-4*np.abs(jac).max())
+
+def test_mol_not_quenched_follows_reassigned_rod_angle():
+    """ The quenching ellipse should follow 'rod_angle' as set at call
+        time, as when 'Simulation' reassigns it after initialization.
+        """
+    exp_inst = fit.MolCoupNanoRodExp(
+        np.array([[60., 40., 0.]]),
+        mol_angle=0.3,
+        param_file=param_file,
+        for_fit=True,
+        )
+    exp_inst.rod_angle = 0.
+
+    x = np.array([70., 0., 0., 50.])
+    y = np.array([0., 70., 20., 20.])
+    ## Ellipse with long radius 80 nm along x, short radius 30 nm along y
+    expected = (x/80.)**2. + (y/30.)**2. > 1
+
+    assert np.array_equal(
+        exp_inst.mol_not_quenched(None, x, y, 80., 30.), expected)
+
+def test_apparent_centroids_of_image_stack_and_flat_image():
+    """ Gaussian centroids should accept (N, H, W) image stacks, and a flat
+        image without an intensity centroid should still be fit.
+        """
+    tools = fit.FittingTools(param_file=param_file)
+    X = (tools.obs_x_nm, tools.obs_y_nm)
+    images = np.stack([
+        tools.twoD_Gaussian(X, 1., 40., -25., 150., 150., 0., 0.),
+        np.ones(tools.obs_x_nm.size),
+        ]).reshape((2,) + tools.obs_x_nm.shape)
+
+    x_cen, y_cen = tools.calculate_apparent_centroids(images)
+
+    assert np.allclose([x_cen[0], y_cen[0]], [40., -25.])
+    assert np.all(np.isfinite([x_cen, y_cen]))
+
+def test_warm_start_radius_rejected_with_pool():
+    """ Warm starts chain sequential fits, so asking for them along with
+        a pool of workers should raise instead of being ignored.
+        """
+    tools = fit.FittingTools(param_file=param_file)
+    images = np.ones((2, tools.obs_x_nm.size))
+    fit_inst = fit.FitModelToData(images, param_file=param_file)
+
+    with pytest.raises(ValueError):
+        fit_inst.fit_model_to_image_data(
+            ini_guess=np.zeros((2, 2)), processes=2, warm_start_radius=20.)